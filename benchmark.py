@@ -0,0 +1,173 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from math_funcs import FUNCTIONS, Ackley
+from runner import OPTIMIZERS, STEPS, make_grid, prepare_task
+
+# Benchmark sweep over functions x optimizers x dims x seeds.
+#   python benchmark.py --dims 2 10 --seeds 5 --out bench.json
+#   python benchmark.py --dims 2 10 --seeds 5 --compare bench.json
+# Each run stops at the first step with f <= f_best + target. Per (function, optimizer, dim)
+# the summary reports success rate, wall time, evaluations, evaluations per second and the
+# COCO/BBOB expected running time ERT = (evaluations summed over all runs, unsuccessful runs
+# counted in full) / successes, in evaluations. Functions without a known f_best have no ERT.
+
+# Relative change beyond which a summary metric counts as a regression
+TOLERANCE = 0.1
+
+# Evaluations per second are noisy: they only count as a regression past their own, looser
+# tolerance and when both results timed at least MIN_TIMED_SECONDS for the configuration
+THROUGHPUT_TOLERANCE = 0.3
+MIN_TIMED_SECONDS = 0.5
+
+def run_one(task, target):
+    func, start_point, params = prepare_task(task)
+    f_target = None if func.f_best is None else func.f_best + target
+
+    best = np.inf
+    evaluations = 0
+    hit = None
+    start = time.perf_counter()
+    for step in STEPS[task['optimizer']](func, start_point, **params):
+        evaluations = step.evaluations
+        if step.f < best:
+            best = float(step.f)
+        if f_target is not None and step.f <= f_target:
+            hit = evaluations
+            break
+    wall = time.perf_counter() - start
+
+    return {
+        'function': task['function'],
+        'optimizer': task['optimizer'],
+        'dim': task['dim'],
+        'seed': task['seed'],
+        'wall_time': wall,
+        'evaluations': evaluations,
+        'evaluations_per_second': evaluations / wall if wall > 0 else None,
+        'best_f': best if np.isfinite(best) else None,
+        'f_target': f_target,
+        'target_hit': hit is not None,
+        'evaluations_to_target': hit
+    }
+
+def _run_one(args):
+    return run_one(*args)
+
+def _warm_up(optimizers):
+    # Pays lazy imports and first-call overheads before anything is timed
+    for opt in optimizers:
+        for _ in STEPS[opt](Ackley(2), np.ones(2), iterations=1):
+            pass
+
+def summarize(runs):
+    groups = {}
+    for run in runs:
+        groups.setdefault((run['function'], run['optimizer'], run['dim']), []).append(run)
+
+    summary = []
+    for (function, optimizer, dim), group in sorted(groups.items()):
+        successes = sum(run['target_hit'] for run in group)
+        spent = sum(run['evaluations_to_target'] if run['target_hit'] else run['evaluations'] for run in group)
+        wall = sum(run['wall_time'] for run in group)
+        evaluations = sum(run['evaluations'] for run in group)
+        summary.append({
+            'function': function,
+            'optimizer': optimizer,
+            'dim': dim,
+            'runs': len(group),
+            'success_rate': successes / len(group),
+            'ert': spent / successes if successes and group[0]['f_target'] is not None else None,
+            'mean_wall_time': wall / len(group),
+            'mean_evaluations': evaluations / len(group),
+            'evaluations_per_second': evaluations / wall if wall > 0 else None
+        })
+    return summary
+
+def benchmark(functions, optimizers, dims, seeds, iterations, target, workers=1, dtype='float64'):
+    jobs = []
+    for dim in dims:
+        params = {opt: {'iterations': iterations} for opt in optimizers}
+        tasks = make_grid(functions, optimizers, [None], range(seeds), params=params, dim=dim, dtype=dtype)
+        jobs.extend((task, target) for task in tasks)
+
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_warm_up, initargs=(optimizers,)) as pool:
+            runs = list(pool.map(_run_one, jobs, chunksize=4))
+    else:
+        _warm_up(optimizers)
+        runs = [run_one(*job) for job in jobs]
+
+    return {
+        'meta': {
+            'functions': functions, 'optimizers': optimizers, 'dims': dims, 'seeds': seeds,
+            'iterations': iterations, 'target': target, 'workers': workers, 'dtype': dtype,
+            'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine()
+        },
+        'runs': runs,
+        'summary': summarize(runs)
+    }
+
+def _timed(entry):
+    return entry['mean_wall_time'] * entry['runs'] >= MIN_TIMED_SECONDS
+
+def compare(current, baseline, tolerance=TOLERANCE, throughput_tolerance=THROUGHPUT_TOLERANCE):
+    # Returns one message per regression of current against baseline
+    previous = {(s['function'], s['optimizer'], s['dim']): s for s in baseline['summary']}
+    regressions = []
+    for entry in current['summary']:
+        key = (entry['function'], entry['optimizer'], entry['dim'])
+        old = previous.get(key)
+        if old is None:
+            continue
+        name = '{}/{}/dim={}'.format(*key)
+        if old['ert'] is not None and (entry['ert'] is None or entry['ert'] > old['ert'] * (1 + tolerance)):
+            regressions.append(f"{name}: ERT {old['ert']:.1f} -> {entry['ert']}")
+        if entry['success_rate'] < old['success_rate'] - tolerance:
+            regressions.append(f"{name}: success rate {old['success_rate']:.2f} -> {entry['success_rate']:.2f}")
+        if old['evaluations_per_second'] and entry['evaluations_per_second'] is not None and _timed(old) and _timed(entry) \
+                and entry['evaluations_per_second'] < old['evaluations_per_second'] * (1 - throughput_tolerance):
+            regressions.append(f"{name}: evaluations/s {old['evaluations_per_second']:.0f} -> {entry['evaluations_per_second']:.0f}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark optimizers on the math_funcs objectives')
+    parser.add_argument('--functions', nargs='+', default=list(FUNCTIONS), choices=list(FUNCTIONS))
+    parser.add_argument('--optimizers', nargs='+', default=list(OPTIMIZERS), choices=list(OPTIMIZERS))
+    parser.add_argument('--dims', nargs='+', type=int, default=[2])
+    parser.add_argument('--seeds', type=int, default=5, help='number of seeds (0..n-1) per configuration')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--target', type=float, default=1e-3, help='success when f <= f_best + target')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--dtype', default='float64', choices=['float64', 'float32'], help='evaluation precision')
+    parser.add_argument('--out', help='write results as JSON')
+    parser.add_argument('--compare', help='baseline JSON; exit with status 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--throughput-tolerance', type=float, default=THROUGHPUT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.functions, args.optimizers, args.dims, args.seeds, args.iterations, args.target, args.workers, args.dtype)
+
+    for s in result['summary']:
+        ert = 'n/a' if s['ert'] is None else f"{s['ert']:.1f}"
+        print(f"{s['function']:12s} {s['optimizer']:9s} dim={s['dim']:<5d} success={s['success_rate']:.2f} "
+              f"ERT={ert:>10s} evals/s={s['evaluations_per_second'] or 0:12.0f} wall={s['mean_wall_time'] * 1000:8.2f} ms")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(result, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.tolerance, args.throughput_tolerance)
+        for message in regressions:
+            print('REGRESSION', message)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import base64
+import altair as alt
+import numpy as np
+import pandas as pd
+from io import BytesIO
+from matplotlib import image
+from surface import evaluate_grid
+
+def surface_image(func, points_by_dim=70, bounds=None, cmap='viridis', grid=None):
+    # The grid as a one-pixel-per-cell PNG data URL: a few KB instead of one JSON row per cell
+    x, y, data = grid if grid is not None else evaluate_grid(func, bounds, points_by_dim)
+    buf = BytesIO()
+    image.imsave(buf, data.T, cmap=cmap, origin='lower', format='png')
+    return 'data:image/png;base64,' + base64.b64encode(buf.getvalue()).decode()
+
+def path_frame(optimization_paths):
+    frames = []
+    for path, label, color in optimization_paths:
+        path = np.asarray(path)
+        frames.append(pd.DataFrame({
+            'optimizer': label,
+            'step': np.arange(len(path)),
+            'x': path[:, 0],
+            'y': path[:, 1]
+        }))
+    if not frames:
+        return pd.DataFrame(columns=['optimizer', 'step', 'x', 'y'])
+    return pd.concat(frames, ignore_index=True)
+
+def path_chart(func, optimization_paths, points_by_dim=70, bounds=None, title='', cmap='viridis', height=600,
+               grid=None, titles=('first dim', 'second dim')):
+    # Heatmap of the function with the optimization paths layered on top. Clicking a legend
+    # entry toggles that optimizer in the browser, without a server round trip.
+    # grid: precomputed (x, y, data) such as SliceSurface.grid() with paths in its coordinates
+    if grid is not None:
+        bounds = (grid[0][0], grid[0][-1], grid[1][0], grid[1][-1])
+        dx = (bounds[1] - bounds[0]) / max(len(grid[0]) - 1, 1)
+        dy = (bounds[3] - bounds[2]) / max(len(grid[1]) - 1, 1)
+    else:
+        if bounds is None:
+            bounds = func.bounds
+        dx = (bounds[1] - bounds[0]) / (points_by_dim - 1)
+        dy = (bounds[3] - bounds[2]) / (points_by_dim - 1)
+    xmin, xmax, ymin, ymax = bounds
+    x_scale = alt.Scale(domain=[xmin, xmax], nice=False)
+    y_scale = alt.Scale(domain=[ymin, ymax], nice=False)
+
+    background = pd.DataFrame([{
+        'x0': xmin - dx / 2, 'x1': xmax + dx / 2,
+        'y0': ymin - dy / 2, 'y1': ymax + dy / 2,
+        'url': surface_image(func, points_by_dim, bounds, cmap, grid)
+    }])
+    surface = alt.Chart(background).mark_image(aspect=False, clip=True).encode(
+        x=alt.X('x0:Q', scale=x_scale, title=titles[0]),
+        x2='x1:Q',
+        y=alt.Y('y0:Q', scale=y_scale, title=titles[1]),
+        y2='y1:Q',
+        url='url:N'
+    )
+
+    labels = [label for _, label, _ in optimization_paths]
+    colors = [color for _, _, color in optimization_paths]
+    selected = alt.selection_point(fields=['optimizer'], bind='legend')
+    paths = alt.Chart(path_frame(optimization_paths)).mark_line(point=True, clip=True).encode(
+        x=alt.X('x:Q', scale=x_scale),
+        y=alt.Y('y:Q', scale=y_scale),
+        order='step:Q',
+        color=alt.Color('optimizer:N', scale=alt.Scale(domain=labels, range=colors),
+                        legend=alt.Legend(title='Optimizer (click to toggle)', orient='bottom-right')),
+        opacity=alt.condition(selected, alt.value(1.0), alt.value(0.05)),
+        tooltip=['optimizer:N', 'step:Q', 'x:Q', 'y:Q']
+    ).add_params(selected)
+
+    return alt.layer(surface, paths).properties(title=title, height=height)
@@ -0,0 +1,65 @@
+import os
+import time
+import pickle
+
+class Checkpoint:
+
+    # Periodic snapshot of one run, passed as checkpoint= to an *_optimization wrapper.
+    # Every `every` steps and/or `seconds` seconds it pickles the optimizer state dict the step
+    # generator keeps current (SGD point and gradient, Adam moments, the CMA object with its
+    # covariance and RNG, restart bookkeeping, the scipy point), the trajectory recorded so far,
+    # the termination state and the step count. The file is written under a temporary name and
+    # then replaces the previous one, so a crash mid-write keeps the last good snapshot.
+    # Creating a Checkpoint for an existing file resumes from it; call the same wrapper with the
+    # same function and arguments (they are not stored) and the run continues from the saved
+    # step. The file is removed once the run finishes.
+
+    def __init__(self, path, every=100, seconds=None):
+
+        self.path = path
+        self.every = every
+        self.seconds = seconds
+
+        self.state = {}
+        self.recorder = None
+        self.termination = None
+        self.steps = 0
+        self.x = None
+        self._saved_at = time.monotonic()
+
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+            self.state = saved['state']
+            self.recorder = saved['recorder']
+            self.termination = saved['termination']
+            self.steps = saved['steps']
+            self.x = saved['x']
+
+    @property
+    def resuming(self):
+
+        return self.recorder is not None
+
+    def step(self, steps, x, recorder, termination):
+
+        # Called by _run after every step; saves when a step or time interval has passed
+        due = bool(self.every) and steps % self.every == 0
+        if self.seconds is not None and time.monotonic() - self._saved_at >= self.seconds:
+            due = True
+        if due:
+            self.save(steps, x, recorder, termination)
+
+    def save(self, steps, x, recorder, termination):
+
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump({'state': self.state, 'recorder': recorder, 'termination': termination,
+                         'steps': steps, 'x': x}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        self._saved_at = time.monotonic()
+
+    def finish(self):
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,147 @@
+import sys
+import json
+import argparse
+import numpy as np
+from math_funcs import make_function, function_bounds
+from runner import make_grid, run_grid, task_streams
+from starts import candidate_points, screen
+from settings import MATRIX_DIR
+
+# Headless batch runs that stream results to Parquet.
+#   python cli.py spec.json --out results.parquet [--workers 8] [--paths]
+#
+# spec.json:
+# {
+#   "functions": ["Ackley", "Rastrigin"],
+#   "dims": [2, 10],
+#   "optimizers": {"SGD": {"lr": 0.05, "iterations": 100}, "CMA-ES": {"sigma": 1.3}},
+#   "start_points": [[3, 2]],                                    (explicit, or)
+#   "sampling": {"scheme": "uniform", "count": 100, "seed": 0},  (sampled inside the bounds)
+#                scheme: uniform, lhs, opposition or quasi_reflection (see starts.py);
+#                "candidates": 1000 generates that many and keeps the best count per seed
+#   "seeds": [0, 1, 2],                                          (or {"count": 10})
+#   "termination": {"ftol": 1e-9, "patience": 20},               (optional, see termination.py)
+#   "dtype": "float32"                                           (optional evaluation precision, default float64)
+# }
+# Rows are written in row groups of --batch-size as runs finish, so memory stays bounded
+# however many runs the spec expands to.
+
+def sample_start_points(sampling, function, dim, seed=None, dtype='float64'):
+    # With "candidates" the points are screened on the function instance of the task seed,
+    # the one prepare_task builds, so seeded functions keep their own best starts
+    count = sampling['count']
+    candidates = max(sampling.get('candidates') or count, count)
+    points = candidate_points(function_bounds(function), dim, candidates,
+                              sampling.get('scheme', 'uniform'), sampling.get('seed', 0))
+    if candidates > count:
+        func = make_function(function, dim, seed=task_streams(seed)[0], storage=MATRIX_DIR, dtype=dtype)
+        points = screen(func, points, count)[0]
+    return points.tolist()
+
+def expand_spec(spec):
+    # Yields run_grid tasks for every function, dim, optimizer, start point and seed
+    seeds = spec.get('seeds', [0])
+    if isinstance(seeds, dict):
+        seeds = list(range(seeds['count']))
+    optimizers = spec['optimizers']
+    if isinstance(optimizers, list):
+        optimizers = {name: {} for name in optimizers}
+
+    dtype = spec.get('dtype', 'float64')
+    sampling = spec.get('sampling')
+    for dim in spec.get('dims', [2]):
+        for function in spec['functions']:
+            if sampling and sampling.get('candidates'):
+                # Screened starts depend on the task seed
+                for seed in seeds:
+                    start_points = sample_start_points(sampling, function, dim, seed, dtype)
+                    yield from make_grid([function], list(optimizers), start_points, [seed], params=optimizers, dim=dim,
+                                         termination=spec.get('termination'), dtype=dtype)
+                continue
+            if sampling:
+                start_points = sample_start_points(sampling, function, dim)
+            else:
+                start_points = spec.get('start_points', [None])
+            yield from make_grid([function], list(optimizers), start_points, seeds, params=optimizers, dim=dim,
+                                 termination=spec.get('termination'), dtype=dtype)
+
+def schema(with_paths):
+    import pyarrow as pa
+    fields = [
+        ('index', pa.int64()),
+        ('function', pa.string()),
+        ('optimizer', pa.string()),
+        ('dim', pa.int32()),
+        ('seed', pa.int64()),
+        ('params', pa.string()),
+        ('start_point', pa.list_(pa.float64())),
+        ('end_point', pa.list_(pa.float64())),
+        ('end_value', pa.float64()),
+        ('reach_min', pa.bool_()),
+        ('opt_steps', pa.int32()),
+        ('stop_reason', pa.string()),
+        ('dtype', pa.string()),
+        ('elapsed', pa.float64())
+    ]
+    if with_paths:
+        fields.append(('path', pa.list_(pa.list_(pa.float64()))))
+    return pa.schema(fields)
+
+def to_row(result, with_paths):
+    row = {
+        'index': result['index'],
+        'function': result['function'],
+        'optimizer': result['optimizer'],
+        'dim': result['dim'],
+        'seed': result['seed'],
+        'params': json.dumps(result['params'], sort_keys=True),
+        'start_point': np.asarray(result['start_point'], dtype=float).tolist(),
+        'end_point': np.asarray(result['end_point'], dtype=float).tolist(),
+        'end_value': result['end_value'],
+        'reach_min': result['reach_min'],
+        'opt_steps': result['opt_steps'],
+        'stop_reason': result['stop_reason'],
+        'dtype': result['dtype'],
+        'elapsed': result['elapsed']
+    }
+    if with_paths:
+        row['path'] = np.asarray(result['path'], dtype=float).tolist()
+    return row
+
+def run_spec(spec, out, executor='process', workers=None, with_paths=False, batch_size=1024):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table_schema = schema(with_paths)
+    rows = []
+    written = 0
+    with pq.ParquetWriter(out, table_schema) as writer:
+        for result in run_grid(expand_spec(spec), executor=executor, max_workers=workers):
+            rows.append(to_row(result, with_paths))
+            if len(rows) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(rows, schema=table_schema))
+                written += len(rows)
+                rows = []
+        if rows:
+            writer.write_table(pa.Table.from_pylist(rows, schema=table_schema))
+            written += len(rows)
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run an optimization spec headlessly and write results to Parquet')
+    parser.add_argument('spec', help='JSON run specification')
+    parser.add_argument('--out', required=True, help='output .parquet file')
+    parser.add_argument('--executor', default='process', choices=['process', 'thread', 'serial'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--paths', action='store_true', help='store full optimization paths as list columns')
+    parser.add_argument('--batch-size', type=int, default=1024, help='rows per Parquet row group')
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    written = run_spec(spec, args.out, args.executor, args.workers, args.paths, args.batch_size)
+    print(f'{written} runs written to {args.out}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
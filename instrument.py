@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from utils.utils_funcs import unwrap
+
+# Opt-in profiling. Off unless FASTOPT_PROFILE=1 or a caller passes enabled=True; when off,
+# instrument() hands back the function itself and profile_run() adds one branch.
+# Records also go to FASTOPT_PROFILE_LOG as JSON lines when that variable is set.
+ENABLED = os.environ.get('FASTOPT_PROFILE') == '1'
+LOG_FILE = os.environ.get('FASTOPT_PROFILE_LOG')
+
+# Most recent records, newest last
+records = deque(maxlen=1000)
+_log_lock = threading.Lock()
+
+class Counted:
+
+    # Wraps an objective and counts calls, evaluated points and time spent inside it.
+    # Only the evaluation methods the wrapped object has are exposed, so optimizers still
+    # pick analytic gradients or finite differences exactly as they would unwrapped.
+
+    def __init__(self, func):
+
+        self.func = func
+        self.calls = 0
+        self.points = 0
+        self.seconds = 0.0
+
+        for name in ('evaluate_batch', 'value_and_grad_batch'):
+            if hasattr(func, name):
+                setattr(self, name, self._timed(getattr(func, name), batch=True))
+        for name in ('value_and_grad', 'grad'):
+            if hasattr(func, name):
+                setattr(self, name, self._timed(getattr(func, name), batch=False))
+        self._call = self._timed(func, batch=False)
+
+    def _timed(self, method, batch):
+
+        def timed(x):
+            start = time.perf_counter()
+            try:
+                return method(x)
+            finally:
+                self.seconds += time.perf_counter() - start
+                self.calls += 1
+                self.points += len(x) if batch and getattr(x, 'ndim', 1) > 1 else 1
+        return timed
+
+    def __call__(self, x):
+
+        return self._call(x)
+
+    def __getattr__(self, name):
+
+        # bounds, global_min, x_best, ... of the wrapped function
+        if name == 'func':
+            raise AttributeError(name)
+        return getattr(self.func, name)
+
+def instrument(func, enabled=None):
+    if not (ENABLED if enabled is None else enabled):
+        return func
+    return Counted(func)
+
+def emit(record):
+    records.append(record)
+    if LOG_FILE:
+        with _log_lock, open(LOG_FILE, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+def timed(phase, fn, *args, enabled=None, **kwargs):
+    # Runs fn and returns (result, record) with the wall time of the phase; record is None when disabled
+    if not (ENABLED if enabled is None else enabled):
+        return fn(*args, **kwargs), None
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    record = {'phase': phase, 'seconds': time.perf_counter() - start}
+    emit(record)
+    return result, record
+
+def profile_run(optimizer, func, start_point, enabled=None, label=None, **params):
+    # Runs one *_optimization call and splits its wall time into objective evaluation and
+    # everything else (optimizer bookkeeping such as CMA tell or scipy internals).
+    # Returns (result, record); record is None when profiling is disabled.
+    if not (ENABLED if enabled is None else enabled):
+        return optimizer(func, start_point, **params), None
+
+    counted = Counted(func)
+    start = time.perf_counter()
+    result = optimizer(counted, start_point, **params)
+    total = time.perf_counter() - start
+
+    record = {
+        'phase': 'optimize',
+        'optimizer': label or optimizer.__name__,
+        'function': type(unwrap(func)).__name__,
+        'calls': counted.calls,
+        'evaluations': counted.points,
+        'objective_seconds': counted.seconds,
+        'overhead_seconds': total - counted.seconds,
+        'total_seconds': total,
+        'steps': int(result[2])
+    }
+    emit(record)
+    return result, record
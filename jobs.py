@@ -0,0 +1,178 @@
+import time
+import uuid
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from termination import Termination
+
+# Background execution of optimization runs for the app. A JobManager is shared by every
+# session of the server: at most max_workers jobs run at once, at most max_queued wait, and
+# a session owns one job at a time (submitting again cancels its previous job).
+
+# Points kept per run for live views; beyond this every other point is dropped
+LIVE_POINTS = 512
+
+class QueueFull(Exception):
+    pass
+
+class Cancelled(Exception):
+    pass
+
+class _Watch(Termination):
+
+    # Termination that also publishes progress and points to its job and stops the run on cancel
+
+    def __init__(self, job, name, iterations, **criteria):
+
+        super().__init__(**criteria)
+        self.job = job
+        self.name = name
+        self.iterations = iterations
+
+    def start(self, func, start_point):
+
+        super().start(func, start_point)
+        self._iteration = 0
+        self._best_f = float('inf')
+        # Termination.__init__ resets through start(None, None) before the job is attached
+        if start_point is not None:
+            self.job.record(self.name, start_point)
+
+    def check(self, step):
+
+        self._iteration += 1
+        self._best_f = min(self._best_f, float(step.f))
+        self.job.report(self.name, self._iteration, self.iterations, self._best_f)
+        self.job.record(self.name, step.x)
+        if self.job.cancelled:
+            self.reason = 'cancelled'
+            return self.reason
+        return super().check(step)
+
+class Job:
+
+    # Handle of one submission. fn(job, *args) runs on a worker thread and its return value
+    # becomes job.result; it reports per-run progress through the terminations from watch().
+    # status: 'queued' -> 'running' -> 'done' | 'cancelled' | 'failed'
+
+    def __init__(self, owner, fn, args, meta=None):
+
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.meta = meta or {}
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self._fn = fn
+        self._args = args
+        self._progress = {}
+        self._points = {}
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+
+        return self.status in ('done', 'cancelled', 'failed')
+
+    def cancel(self):
+
+        self._cancel.set()
+
+    def watch(self, name, iterations, **criteria):
+
+        # Termination for one run of this job; pass it as termination= to an *_optimization
+        self.report(name, 0, iterations, float('inf'))
+        return _Watch(self, name, iterations, **criteria)
+
+    def check_cancelled(self, termination):
+
+        # Raises Cancelled when the run watched by termination was stopped by cancel()
+        if termination.reason == 'cancelled':
+            raise Cancelled
+
+    def report(self, name, iteration, iterations, best_f):
+
+        with self._lock:
+            self._progress[name] = {'iteration': iteration, 'iterations': iterations, 'best_f': best_f}
+
+    def progress(self):
+
+        with self._lock:
+            return {name: dict(p) for name, p in self._progress.items()}
+
+    def record(self, name, x):
+
+        # Points of a run so far, thinned to at most LIVE_POINTS (first and last always kept)
+        with self._lock:
+            points = self._points.setdefault(name, [])
+            points.append(np.array(x, dtype=float))
+            if len(points) > LIVE_POINTS:
+                del points[1:-1:2]
+
+    def points(self, name):
+
+        with self._lock:
+            points = self._points.get(name)
+            return np.array(points) if points else None
+
+    def _execute(self):
+
+        if self.cancelled:
+            self.status = 'cancelled'
+            return
+        self.status = 'running'
+        try:
+            self.result = self._fn(self, *self._args)
+            self.status = 'cancelled' if self.cancelled else 'done'
+        except Cancelled:
+            self.status = 'cancelled'
+        except Exception as error:
+            self.error = error
+            self.status = 'failed'
+
+class JobManager:
+
+    def __init__(self, max_workers=2, max_queued=8):
+
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix='fastopt-job')
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, owner, fn, *args, meta=None):
+
+        job = Job(owner, fn, args, meta)
+        with self._lock:
+            # The owner's previous jobs are replaced, so they do not count against capacity;
+            # they are only cancelled once the new job is accepted
+            previous = [other for other in self._active.values() if other.owner == owner]
+            others = len(self._active) - len(previous)
+            if others >= self.max_workers + self.max_queued:
+                raise QueueFull(f'{others} jobs already queued or running')
+            for other in previous:
+                other.cancel()
+            self._active[job.id] = job
+        self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+
+        try:
+            job._execute()
+        finally:
+            with self._lock:
+                self._active.pop(job.id, None)
+
+    def stats(self):
+
+        with self._lock:
+            running = sum(job.status == 'running' for job in self._active.values())
+            return {'running': running, 'queued': len(self._active) - running, 'max_workers': self.max_workers}
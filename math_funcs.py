@@ -1,106 +1,276 @@
+import os
+import uuid
 import numpy as np
 import math
-from utils.utils_funcs import check_dim, easy_bounds
+from utils.utils_funcs import check_dim, easy_bounds, as_batch
 
-class Ackley:
+class _Function:
+
+    # Subclasses implement evaluate_batch and value_and_grad_batch on (n, dim)
+    # arrays; the single-point API is a batch of one. dtype is the precision inputs are
+    # cast to and values, gradients and constant matrices are kept in: float64 by
+    # default, float32 halves the memory traffic of screening sweeps.
+
+    dtype = np.dtype(np.float64)
+
+    def __call__(self, vec):
+
+        return self.evaluate_batch(vec)[0]
+
+    def value_and_grad(self, vec):
+
+        values, grads = self.value_and_grad_batch(vec)
+
+        return values[0], grads[0]
+
+    def grad(self, vec):
+
+        return self.value_and_grad(vec)[1]
+
+class Ackley(_Function):
 
     b = 3
     global_min = [0.0, 0.0]
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 1)
 
+        self.dtype = np.dtype(dtype)
         self.x_best = np.zeros(dim)
         self.f_best = 0
         self.bounds = easy_bounds(Ackley.b)
         self.bias = 20 + math.e
         self.pi2 = 2 * math.pi
 
-    def __call__(self, vec):
+    def evaluate_batch(self, X):
 
-        s1 = sum((x*x for x in vec))/vec.size
-        s2 = sum((math.cos(self.pi2 * x) for x in vec))/vec.size
+        X = as_batch(X, self.dtype)
+        s1 = np.mean(X * X, axis=1)
+        s2 = np.mean(np.cos(self.pi2 * X), axis=1)
 
+        return self.bias - 20*np.exp(-0.2*s1) - np.exp(s2)
 
-        return self.bias - 20*math.exp(-0.2*s1) - math.exp(s2)
-    
-class Rastrigin:
+    def value_and_grad_batch(self, X):
+
+        X = as_batch(X, self.dtype)
+        n = X.shape[1]
+        e1 = np.exp(-0.2*np.mean(X * X, axis=1, keepdims=True))
+        e2 = np.exp(np.mean(np.cos(self.pi2 * X), axis=1, keepdims=True))
+        values = self.bias - 20*e1[:, 0] - e2[:, 0]
+        grads = (8*e1*X + self.pi2*e2*np.sin(self.pi2 * X)) / n
+
+        return values, grads
+
+class Rastrigin(_Function):
 
     b = 5.12
     global_min = [0.0, 0.0]
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 1)
 
+        self.dtype = np.dtype(dtype)
         self.x_best = np.zeros(dim)
         self.f_best = 0
         self.pi2 = math.pi*2
         self.bias = 10*dim
         self.bounds = easy_bounds(Rastrigin.b)
 
+    def evaluate_batch(self, X):
 
-    def __call__(self, vec):
-
-        s = sum(( x*x - math.cos(self.pi2*x)*10 for x in vec))
+        X = as_batch(X, self.dtype)
+        s = np.sum(X * X - np.cos(self.pi2 * X) * 10, axis=1)
 
         return self.bias + s
-    
-class Rosenbrock:
-    
+
+    def value_and_grad_batch(self, X):
+
+        X = as_batch(X, self.dtype)
+        values = self.evaluate_batch(X)
+        grads = 2*X + 10*self.pi2*np.sin(self.pi2 * X)
+
+        return values, grads
+
+class Rosenbrock(_Function):
+
     b = 2.048
     global_min = [1.0, 1.0]
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 2)
 
+        self.dtype = np.dtype(dtype)
         self.x_best = np.ones(dim)
         self.f_best = 0
 
         self.bounds = easy_bounds(Rosenbrock.b)
 
-    
-    def __call__(self, vec):
+    def evaluate_batch(self, X):
+
+        X = as_batch(X, self.dtype)
+        head, tail = X[:, :-1], X[:, 1:]
 
-        s = sum(( 100 * (vec[i+1] - vec[i]**2) ** 2 + (vec[i] - 1)**2 for i in range(vec.size-1)))
+        return np.sum(100 * (tail - head**2) ** 2 + (head - 1)**2, axis=1)
 
-        return s
+    def value_and_grad_batch(self, X):
+
+        X = as_batch(X, self.dtype)
+        head, tail = X[:, :-1], X[:, 1:]
+        r = tail - head**2
+        values = np.sum(100 * r ** 2 + (head - 1)**2, axis=1)
+        grads = np.zeros_like(X)
+        grads[:, :-1] = -400 * head * r + 2 * (head - 1)
+        grads[:, 1:] += 200 * r
+
+        return values, grads
+
+class Fletcher(_Function):
 
-class Fletcher:
-    
     b = math.pi
     global_min = [0.0, 0.0]
 
-    def __init__(self, dim, seed = None):
+    def __init__(self, dim, seed = None, rng = None, dtype = np.float64):
 
-        if seed != None:
-            np.random.seed(seed)
+        # A local stream leaves the global np.random state alone; seeded
+        # instances draw the same matrices as np.random.seed(seed) did,
+        # whatever the dtype they are then stored in
+        if rng is None:
+            rng = np.random.RandomState(seed) if seed is not None else np.random
 
         check_dim(dim, 1)
 
-        self.x_best = np.random.uniform(-np.pi, np.pi, dim)
+        self.dtype = np.dtype(dtype)
+        self.x_best = rng.uniform(-np.pi, np.pi, dim)
         self.f_best = 0
         self.bounds = easy_bounds(Fletcher.b)
 
-        self.a = np.random.uniform(-100, 100, (dim, dim))
-        self.b = np.random.uniform(-100, 100, (dim, dim))
+        # sum(a * sin(x), axis=0) only scales each sin(x_j) by a column sum,
+        # so both matrices reduce to two vectors once (summed in float64) and
+        # are not kept; instances stay O(dim) to pickle and fingerprint
+        a_sum = rng.uniform(-100, 100, (dim, dim)).sum(axis=0)
+        b_sum = rng.uniform(-100, 100, (dim, dim)).sum(axis=0)
+        self.a_sum = a_sum.astype(self.dtype, copy=False)
+        self.b_sum = b_sum.astype(self.dtype, copy=False)
 
-        self.A = np.sum(self.a * np.sin(self.x_best) + self.b * np.cos(self.x_best), axis = 0)
-    
-    def __call__(self, vec):
+        self.A = (a_sum * np.sin(self.x_best) + b_sum * np.cos(self.x_best)).astype(self.dtype, copy=False)
+
+    def evaluate_batch(self, X):
+
+        X = as_batch(X, self.dtype)
+        B = self.a_sum * np.sin(X) + self.b_sum * np.cos(X)
+
+        return np.sum((self.A - B)**2, axis=1)
+
+    def value_and_grad_batch(self, X):
 
-        B = np.sum(self.a * np.sin(vec) + self.b * np.cos(vec) ,axis = 0)
-        #raise Exception()
-        return  sum((a-b)**2 for a, b in zip(self.A, B))
+        X = as_batch(X, self.dtype)
+        sin, cos = np.sin(X), np.cos(X)
+        D = self.A - (self.a_sum * sin + self.b_sum * cos)
+        values = np.sum(D**2, axis=1)
+        grads = -2 * D * (self.a_sum * cos - self.b_sum * sin)
+
+        return values, grads
+
+class FletcherPowell(_Function):
+
+    # Fletcher-Powell with the full coupling: A = a @ sin(x*) + b @ cos(x*) and
+    # f(x) = |A - (a @ sin(x) + b @ cos(x))|^2, evaluated with matrix products only.
+    # With storage set, a and b live in .npy files under that directory and are opened
+    # memory-mapped: they are generated in row blocks, seeded files are reused, and
+    # pickling ships the file names so process-pool workers attach without a copy.
+    # A float32 instance stores the same draws rounded, in files of half the size.
+
+    b = math.pi
+    global_min = [0.0, 0.0]
+
+    def __init__(self, dim, seed = None, rng = None, storage = None, block = 256, dtype = np.float64):
+
+        if rng is None:
+            rng = np.random.RandomState(seed) if seed is not None else np.random
+
+        check_dim(dim, 1)
+
+        self.dtype = np.dtype(dtype)
+        self.x_best = rng.uniform(-np.pi, np.pi, dim)
+        self.f_best = 0
+        self.bounds = easy_bounds(FletcherPowell.b)
+
+        if storage is None:
+            self.a = rng.uniform(-100, 100, (dim, dim)).astype(self.dtype, copy=False)
+            self.b = rng.uniform(-100, 100, (dim, dim)).astype(self.dtype, copy=False)
+        else:
+            name = f'fletcher_powell_{dim}_{seed if seed is not None else uuid.uuid4().hex}'
+            if self.dtype != np.float64:
+                name += f'_{self.dtype.name}'
+            files = [os.path.join(storage, f'{name}_{m}.npy') for m in 'ab']
+            if seed is not None and all(os.path.exists(f) for f in files):
+                self.a, self.b = (np.load(f, mmap_mode='r') for f in files)
+            else:
+                os.makedirs(storage, exist_ok=True)
+                self.a, self.b = (self._random_matrix(rng, dim, f, block, self.dtype) for f in files)
+
+        # In the matrices' dtype, so a float32 a never gets a float64 copy
+        sin_best, cos_best = np.sin(self.x_best).astype(self.dtype), np.cos(self.x_best).astype(self.dtype)
+        self.A = self.a @ sin_best + self.b @ cos_best
+
+    @staticmethod
+    def _random_matrix(rng, dim, filename, block, dtype = np.float64):
+
+        # Same draws as rng.uniform(-100, 100, (dim, dim)) without holding the matrix in memory;
+        # written under a temporary name first so concurrent workers never see a partial file
+        tmp = f'{filename}.{os.getpid()}.tmp'
+        out = np.lib.format.open_memmap(tmp, mode='w+', dtype=dtype, shape=(dim, dim))
+        for start in range(0, dim, block):
+            out[start:start + block] = rng.uniform(-100, 100, (min(block, dim - start), dim))
+        out.flush()
+        del out
+        os.replace(tmp, filename)
+
+        return np.load(filename, mmap_mode='r')
+
+    def __getstate__(self):
+
+        state = dict(vars(self))
+        for name in ('a', 'b'):
+            if isinstance(state[name], np.memmap):
+                state[name] = state[name].filename
+
+        return state
+
+    def __setstate__(self, state):
+
+        for name in ('a', 'b'):
+            if isinstance(state[name], str):
+                state[name] = np.load(state[name], mmap_mode='r')
+        self.__dict__.update(state)
+
+    def evaluate_batch(self, X):
+
+        X = as_batch(X, self.dtype)
+        B = np.sin(X) @ self.a.T + np.cos(X) @ self.b.T
+
+        return np.sum((self.A - B)**2, axis=1)
+
+    def value_and_grad_batch(self, X):
+
+        X = as_batch(X, self.dtype)
+        sin, cos = np.sin(X), np.cos(X)
+        D = self.A - (sin @ self.a.T + cos @ self.b.T)
+        values = np.sum(D**2, axis=1)
+        grads = -2 * (cos * (D @ self.a) - sin * (D @ self.b))
+
+        return values, grads
+
+class Michalewicz(_Function):
 
-class Michalewicz:
-    
     global_min = [2.20, 1.57]
 
-    def __init__(self, m = 10):
+    def __init__(self, m = 10, dtype = np.float64):
 
+        self.dtype = np.dtype(dtype)
         self.x_best = None
         self.f_best = None
 
@@ -108,6 +278,48 @@ class Michalewicz:
 
         self.m = m*2
 
-    def __call__(self, vec):
-
-        return -sum(( math.sin(x)*math.sin((i+1)*x**2/math.pi)**self.m for i, x in enumerate(vec)))
\ No newline at end of file
+    def evaluate_batch(self, X):
+
+        X = as_batch(X, self.dtype)
+        i = np.arange(1, X.shape[1] + 1, dtype=self.dtype)
+
+        return -np.sum(np.sin(X) * np.sin(i * X**2 / math.pi)**self.m, axis=1)
+
+    def value_and_grad_batch(self, X):
+
+        X = as_batch(X, self.dtype)
+        i = np.arange(1, X.shape[1] + 1, dtype=self.dtype)
+        u = i * X**2 / math.pi
+        s, sin = np.sin(u), np.sin(X)
+        values = -np.sum(sin * s**self.m, axis=1)
+        grads = -(np.cos(X) * s**self.m + sin * self.m * s**(self.m - 1) * np.cos(u) * 2 * i * X / math.pi)
+
+        return values, grads
+
+FUNCTIONS = {
+    'Ackley': Ackley,
+    'Rastrigin': Rastrigin,
+    'Rosenbrock': Rosenbrock,
+    'Fletcher': Fletcher,
+    'FletcherPowell': FletcherPowell,
+    'Michalewicz': Michalewicz
+}
+
+def make_function(name, dim, seed=None, storage=None, dtype=np.float64):
+    # storage: directory for memory-mapped FletcherPowell matrices, ignored by the others.
+    # dtype: evaluation precision ('float64' or 'float32'); the same seed gives the same
+    # function in either, so float32 screening can be refined on a float64 instance.
+    if name == 'Fletcher':
+        return Fletcher(dim, seed=seed, dtype=dtype)
+    if name == 'FletcherPowell':
+        return FletcherPowell(dim, seed=seed, storage=storage, dtype=dtype)
+    if name == 'Michalewicz':
+        # Defined in any dimension; its parameter is the steepness m, not the dimension
+        return Michalewicz(dtype=dtype)
+    return FUNCTIONS[name](dim, dtype=dtype)
+
+def function_bounds(name):
+    # Bounds of a registered function without building it, so no matrices are drawn
+    if name == 'Michalewicz':
+        return (0, math.pi, 0, math.pi)
+    return easy_bounds(FUNCTIONS[name].b)
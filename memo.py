@@ -0,0 +1,186 @@
+import os
+import threading
+import numpy as np
+from cachetools import LRUCache
+from utils.utils_funcs import as_batch
+
+# Opt-in memoization of objective evaluations. Off unless FASTOPT_MEMO=1 or a caller passes
+# enabled=True; when off, memoize() hands back the function itself.
+ENABLED = os.environ.get('FASTOPT_MEMO') == '1'
+
+_MISSING = object()
+
+class Memoized:
+
+    # Wraps an objective and remembers values and value/gradient pairs per input point in
+    # bounded LRU caches. Points are keyed on their exact float64 bytes, or after rounding to
+    # `decimals` when quantization is wanted (a hit then returns the value of the first point
+    # seen in that cell). Like instrument.Counted only the evaluation methods the wrapped object
+    # has are exposed, so optimizers pick analytic gradients or finite differences unchanged.
+
+    def __init__(self, func, maxsize=100_000, decimals=None):
+
+        self.func = func
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self._reset()
+
+        if hasattr(func, 'evaluate_batch'):
+            self.evaluate_batch = self._evaluate_batch
+        if hasattr(func, 'value_and_grad_batch'):
+            self.value_and_grad_batch = self._value_and_grad_batch
+        if hasattr(func, 'value_and_grad'):
+            self.value_and_grad = self._value_and_grad
+        if hasattr(func, 'grad'):
+            self.grad = self._grad
+
+    def _reset(self):
+
+        self._values = LRUCache(self.maxsize)
+        self._pairs = LRUCache(self.maxsize)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+
+        # Pickled copies (process-pool workers) start with empty caches
+        state = dict(vars(self))
+        for name in ('_values', '_pairs', '_lock', 'evaluate_batch', 'value_and_grad_batch', 'value_and_grad', 'grad'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+
+        self.__init__(state['func'], state['maxsize'], state['decimals'])
+        self.hits = state['hits']
+        self.misses = state['misses']
+
+    def __getattr__(self, name):
+
+        # bounds, global_min, x_best, ... of the wrapped function
+        if name == 'func':
+            raise AttributeError(name)
+        return getattr(self.func, name)
+
+    def _key(self, x):
+
+        x = np.asarray(x, dtype=float)
+        if self.decimals is not None:
+            # + 0.0 folds -0.0 into 0.0
+            x = np.round(x, self.decimals) + 0.0
+        return np.ascontiguousarray(x).tobytes()
+
+    def _lookup(self, cache, keys):
+
+        # Indices of rows to compute, first row per distinct missing key; cached entries by index
+        found = {}
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = cache.get(key, _MISSING)
+                if entry is not _MISSING:
+                    found[i] = entry
+                    self.hits += 1
+                elif key in missing:
+                    self.hits += 1
+                else:
+                    missing[key] = i
+                    self.misses += 1
+        return found, missing
+
+    def __call__(self, x):
+
+        key = self._key(x)
+        with self._lock:
+            value = self._values.get(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = self.func(x)
+        with self._lock:
+            self._values[key] = value
+        return value
+
+    def _evaluate_batch(self, X):
+
+        X = as_batch(X)
+        keys = [self._key(x) for x in X]
+        found, missing = self._lookup(self._values, keys)
+        if missing:
+            rows = list(missing.values())
+            computed = self.func.evaluate_batch(X[rows])
+            with self._lock:
+                for key, value in zip(missing, computed):
+                    self._values[key] = value
+            by_key = dict(zip(missing, computed))
+        else:
+            by_key = {}
+        return np.array([found[i] if i in found else by_key[key] for i, key in enumerate(keys)], dtype=float)
+
+    def _value_and_grad_batch(self, X):
+
+        X = as_batch(X)
+        keys = [self._key(x) for x in X]
+        found, missing = self._lookup(self._pairs, keys)
+        by_key = {}
+        if missing:
+            rows = list(missing.values())
+            values, grads = self.func.value_and_grad_batch(X[rows])
+            with self._lock:
+                for key, value, grad in zip(missing, values, grads):
+                    self._pairs[key] = (value, np.array(grad))
+                    self._values[key] = value
+                    by_key[key] = (value, grad)
+        pairs = [found[i] if i in found else by_key[key] for i, key in enumerate(keys)]
+        return np.array([p[0] for p in pairs], dtype=float), np.array([p[1] for p in pairs], dtype=float)
+
+    def _value_and_grad(self, x):
+
+        key = self._key(x)
+        with self._lock:
+            pair = self._pairs.get(key, _MISSING)
+            if pair is not _MISSING:
+                self.hits += 1
+                return pair[0], pair[1].copy()
+            self.misses += 1
+
+        value, grad = self.func.value_and_grad(x)
+        with self._lock:
+            self._pairs[key] = (value, np.array(grad))
+            self._values[key] = value
+        return value, grad
+
+    def _grad(self, x):
+
+        return self._value_and_grad(x)[1]
+
+    def stats(self):
+
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                # Distinct points: a value_and_grad miss fills both caches with the same key
+                'size': len(set(self._values.keys()).union(self._pairs.keys())),
+                'values': len(self._values),
+                'pairs': len(self._pairs),
+                'maxsize': self.maxsize
+            }
+
+    def clear(self):
+
+        with self._lock:
+            self._values.clear()
+            self._pairs.clear()
+            self.hits = 0
+            self.misses = 0
+
+def memoize(func, enabled=None, maxsize=100_000, decimals=None):
+    if not (ENABLED if enabled is None else enabled):
+        return func
+    return Memoized(func, maxsize, decimals)
@@ -1,128 +1,559 @@
+import time
+import queue
+import threading
 import numpy as np
-from cmaes import CMA
-from scipy.optimize import minimize
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from trajectory import Trajectory
+from utils.utils_funcs import bounds_box
+from termination import Termination, known_minimum
 
-# SGD optimizer
-def sgd_optimization(func, start_point, lr=0.05, iterations=50):
-    reach_min = False
-    opt_steps = iterations
-    path = [start_point]
-    x = start_point.copy()
-    for _ in range(iterations):
-        grad = np.array([func(x + np.eye(1, len(x), i)[0] * 1e-8) - func(x) for i in range(len(x))]) / 1e-8
+FD_STEP = 1e-8
+
+# cmaes and scipy.optimize are imported on first use to keep app start-up light
+
+# One record per iteration: the new point, its objective value, objective evaluations
+# used so far and wall time since the run started. For CMA-ES x is the distribution
+# mean and f the best value sampled in that generation. grad_norm (SGD, Adam) and
+# sigma (CMA) are reported by the optimizers that have them, None otherwise.
+# Restart strategies (IPOP/BIPOP) set restarts and report in best_x the best point sampled
+# over all their instances so far, which is their result rather than the current mean.
+Step = namedtuple('Step', ['x', 'f', 'evaluations', 'elapsed', 'grad_norm', 'sigma', 'best_x', 'restarts'],
+                  defaults=(None, None, None, False))
+
+class StopOptimization(Exception):
+    pass
+
+# Evaluation precision of a function (math_funcs dtype policy), float64 when it has none
+def _dtype(func):
+    return np.dtype(getattr(func, 'dtype', np.float64))
+
+# Forward-difference step: FD_STEP in float64, sqrt(eps) in lower precisions where
+# FD_STEP would vanish against x
+def _fd_step(func):
+    dtype = _dtype(func)
+    return FD_STEP if dtype == np.float64 else float(np.sqrt(np.finfo(dtype).eps))
+
+# Analytic value and gradient when the function provides them, forward differences otherwise
+def _value_and_grad(func, x):
+    if hasattr(func, 'value_and_grad'):
+        return func.value_and_grad(x)
+    fx = func(x)
+    h = _fd_step(func)
+    grad = np.empty(len(x))
+    for i in range(len(x)):
+        xi = x.copy()
+        xi[i] += h
+        grad[i] = (func(xi) - fx) / h
+    return fx, grad
+
+# Objective evaluations spent by one _value_and_grad call
+def _grad_cost(func, x):
+    return 1 if hasattr(func, 'value_and_grad') else len(x) + 1
+
+# Same as _value_and_grad for an (N, dim) population
+def _value_and_grad_batch(func, X):
+    if hasattr(func, 'value_and_grad_batch'):
+        return func.value_and_grad_batch(X)
+    values, grads = zip(*(_value_and_grad(func, x) for x in X))
+    return np.array(values), np.array(grads)
+
+# Row-wise version of the Termination global_min check
+def _reached_min_batch(func, X):
+    target = known_minimum(func, X.shape[1])
+    if target is None:
+        return np.zeros(len(X), dtype=bool)
+    return np.all(np.isclose(np.round(X, 2), np.round(target, 2)), axis=1)
+
+# Scores a whole population: on an executor (anything with .map) or a batch function
+# taking an (n, dim) array when given, else in one evaluate_batch call when available
+def _evaluate_population(func, xs, executor=None):
+    if executor is not None:
+        if hasattr(executor, 'map'):
+            return list(executor.map(func, xs))
+        return list(executor(np.array(xs)))
+    if hasattr(func, 'evaluate_batch'):
+        return list(func.evaluate_batch(np.array(xs)))
+    return [func(x) for x in xs]
+
+# Objective and jac arguments for scipy.optimize.minimize
+def _scipy_objective(func):
+    if hasattr(func, 'value_and_grad'):
+        return func.value_and_grad, True
+    return func, None
+
+# cmaes 0.10 has no public accessor for the distribution mean or the step size
+def _cma_mean(optimizer):
+    return optimizer._mean
+
+def _cma_sigma(optimizer):
+    return optimizer._sigma
+
+# Pickling a CMA object drops its RandomState, so checkpoints carry the generator state separately
+def _cma_rng_state(optimizer):
+    return optimizer._rng.get_state()
+
+def _cma_set_rng_state(optimizer, rng_state):
+    optimizer._rng.set_state(rng_state)
+
+# It also stores only the upper triangle of the covariance, which is not exactly symmetric
+# after tell(); checkpoints carry the full matrix so a resumed run matches to the last bit
+def _cma_covariance(optimizer):
+    return optimizer._C
+
+def _cma_set_covariance(optimizer, covariance):
+    optimizer._C = covariance
+
+# Every step generator takes an optional state dict that it keeps current before each yield
+# (see checkpoint.py); passing a filled one back continues the run where it stopped.
+
+# SGD steps
+def sgd_steps(func, start_point, lr=0.05, iterations=50, state=None):
+    state = {} if state is None else state
+    x = np.array(start_point, dtype=float)
+    cost = _grad_cost(func, x)
+    if state:
+        x, fx, grad, evaluations, t = state['x'], state['f'], state['grad'], state['evaluations'], state['t']
+    else:
+        fx, grad = _value_and_grad(func, x)
+        evaluations, t = cost, 0
+    start = time.perf_counter() - state.get('elapsed', 0.0)
+    while t < iterations:
+        t += 1
         x = x - lr * grad
-        path.append(x.copy())
-        if np.allclose(np.round(np.abs(x), 2), np.round(np.abs(func.global_min), 2)):
-            reach_min = True
-            opt_steps = _
-            break
-    return np.array(path), reach_min, opt_steps, x
+        fx, grad = _value_and_grad(func, x)
+        evaluations += cost
+        elapsed = time.perf_counter() - start
+        state.update(x=x, f=fx, grad=grad, evaluations=evaluations, t=t, elapsed=elapsed)
+        yield Step(x, fx, evaluations, elapsed, np.linalg.norm(grad))
 
-# Adam optimizer
-def adam_optimization(func, start_point, lr=0.05, beta1=0.9, beta2=0.999, epsilon=1e-8, iterations=50):
-    reach_min = False
-    path = [start_point]
-    opt_steps = iterations
-    x = start_point.copy()
-    m = np.zeros_like(x)
-    v = np.zeros_like(x)
-    t = 0
-    for _ in range(iterations):
+# Adam steps
+def adam_steps(func, start_point, lr=0.05, beta1=0.9, beta2=0.999, epsilon=1e-8, iterations=50, state=None):
+    state = {} if state is None else state
+    x = np.array(start_point, dtype=float)
+    cost = _grad_cost(func, x)
+    if state:
+        x, fx, grad, evaluations, t = state['x'], state['f'], state['grad'], state['evaluations'], state['t']
+        m, v = state['m'], state['v']
+    else:
+        fx, grad = _value_and_grad(func, x)
+        evaluations, t = cost, 0
+        m = np.zeros_like(x)
+        v = np.zeros_like(x)
+    start = time.perf_counter() - state.get('elapsed', 0.0)
+    while t < iterations:
         t += 1
-        grad = np.array([func(x + np.eye(1, len(x), i)[0] * 1e-8) - func(x) for i in range(len(x))]) / 1e-8
         m = beta1 * m + (1 - beta1) * grad
         v = beta2 * v + (1 - beta2) * grad**2
         m_hat = m / (1 - beta1**t)
         v_hat = v / (1 - beta2**t)
         x = x - lr * m_hat / (np.sqrt(v_hat) + epsilon)
-        path.append(x.copy())
-        if np.allclose(np.round(np.abs(x), 2), np.round(np.abs(func.global_min), 2)):
-            reach_min = True
-            opt_steps = t
-            break
-    return np.array(path), reach_min, opt_steps, x
+        fx, grad = _value_and_grad(func, x)
+        evaluations += cost
+        elapsed = time.perf_counter() - start
+        state.update(x=x, f=fx, grad=grad, m=m, v=v, evaluations=evaluations, t=t, elapsed=elapsed)
+        yield Step(x, fx, evaluations, elapsed, np.linalg.norm(grad))
 
-# CMA-ES
-def cmaes_optimization(func, start_point, sigma=1.3, iterations=50):
-    reach_min = False
-    opt_steps = iterations
-    optimizer = CMA(mean=start_point, sigma=sigma)
-    path = [start_point.copy()]
-    for generation in range(iterations):
-        solutions = []
-        for _ in range(optimizer.population_size):
-            x = optimizer.ask()
-            value = func(x)
-            solutions.append((x, value))
-        optimizer.tell(solutions)
-        path.append(optimizer._mean.copy())
-        if np.allclose(np.round(np.abs(optimizer._mean), 2), np.round(np.abs(func.global_min), 2)):
-            reach_min = True
-            opt_steps = generation
-            break
-    return np.array(path), reach_min, opt_steps, optimizer._mean
+# CMA-ES steps, one per generation. The CMA object (mean, covariance, evolution paths and
+# its RNG) is the whole optimizer state.
+def cmaes_steps(func, start_point, sigma=1.3, iterations=50, seed=None, executor=None, lr_adapt=False, state=None):
+    from cmaes import CMA
+    state = {} if state is None else state
+    if state:
+        optimizer, generation, evaluations = state['optimizer'], state['generation'], state['evaluations']
+        _cma_set_rng_state(optimizer, state['rng'])
+        _cma_set_covariance(optimizer, state['covariance'])
+    else:
+        optimizer = CMA(mean=np.array(start_point, dtype=float), sigma=sigma, lr_adapt=lr_adapt, seed=seed)
+        generation = evaluations = 0
+    start = time.perf_counter() - state.get('elapsed', 0.0)
+    while generation < iterations:
+        generation += 1
+        xs = [optimizer.ask() for _ in range(optimizer.population_size)]
+        values = _evaluate_population(func, xs, executor)
+        optimizer.tell(list(zip(xs, values)))
+        evaluations += len(xs)
+        elapsed = time.perf_counter() - start
+        state.update(optimizer=optimizer, rng=_cma_rng_state(optimizer), covariance=_cma_covariance(optimizer),
+                     generation=generation, evaluations=evaluations, elapsed=elapsed)
+        yield Step(_cma_mean(optimizer).copy(), min(values), evaluations, elapsed, sigma=_cma_sigma(optimizer))
 
-# LRA-CMA
-def lra_cma_optimization(func, start_point, sigma=1.3, iterations=50):
-    reach_min = False
-    opt_steps = iterations
-    optimizer = CMA(mean=start_point, sigma=sigma, lr_adapt=True)
-    path = [start_point.copy()]
-    for generation in range(iterations):
-        solutions = []
-        for _ in range(optimizer.population_size):
-            x = optimizer.ask()
-            value = func(x)
-            solutions.append((x, value))
-        optimizer.tell(solutions)
-        path.append(optimizer._mean.copy())
-        if np.allclose(np.round(np.abs(optimizer._mean), 2), np.round(np.abs(func.global_min), 2)):
-            reach_min = True
-            opt_steps = generation
+# LRA-CMA steps
+def lra_cma_steps(func, start_point, sigma=1.3, iterations=50, seed=None, executor=None, state=None):
+    yield from cmaes_steps(func, start_point, sigma, iterations, seed, executor, lr_adapt=True, state=state)
+
+# Population size cmaes uses by default
+def _default_popsize(dim):
+    return 4 + int(3 * np.log(dim))
+
+# One CMA instance run until it stops itself (cmaes' should_stop), its generation best has not
+# improved for 10 + 30 * dim / popsize generations, or its budget is spent.
+# Yields (mean, best f of the generation, evaluations, sigma, best point of the generation)
+# per generation.
+def _cma_instance(func, mean, sigma, popsize, seed, lr_adapt=False, max_generations=None, max_evaluations=None,
+                  executor=None, state=None):
+    from cmaes import CMA
+    state = {} if state is None else state
+    if state:
+        optimizer, best, since_best = state['optimizer'], state['best'], state['since_best']
+        evaluations, generation = state['evaluations'], state['generation']
+        _cma_set_rng_state(optimizer, state['rng'])
+        _cma_set_covariance(optimizer, state['covariance'])
+    else:
+        optimizer = CMA(mean=np.array(mean, dtype=float), sigma=sigma, population_size=popsize, lr_adapt=lr_adapt, seed=seed)
+        best = np.inf
+        since_best = evaluations = generation = 0
+    patience = 10 + int(np.ceil(30 * len(mean) / popsize))
+    while not optimizer.should_stop() and since_best < patience:
+        if max_generations is not None and generation >= max_generations:
+            break
+        if max_evaluations is not None and evaluations + popsize > max_evaluations:
             break
-    return np.array(path), reach_min, opt_steps, optimizer._mean
+        xs = [optimizer.ask() for _ in range(popsize)]
+        values = _evaluate_population(func, xs, executor)
+        optimizer.tell(list(zip(xs, values)))
+        evaluations += popsize
+        generation += 1
+        k = int(np.argmin(values))
+        f = values[k]
+        if f < best:
+            best = f
+            since_best = 0
+        else:
+            since_best += 1
+        state.update(optimizer=optimizer, rng=_cma_rng_state(optimizer), covariance=_cma_covariance(optimizer),
+                     best=best, since_best=since_best,
+                     evaluations=evaluations, generation=generation)
+        yield _cma_mean(optimizer).copy(), f, evaluations, _cma_sigma(optimizer), np.array(xs[k])
 
-class StopOptimization(Exception):
-    pass
+# Process-pool entry point: a whole instance run as a list
+def _cma_instance_history(*args):
+    return list(_cma_instance(*args))
 
-# BFGS optimizer
-def bfgs_optimization(func, start_point, iterations=50):
-    reach_min = False
-    iteration_count = 0
-    path = [start_point]
-
-    def callback(xk):
-        nonlocal reach_min, iteration_count
-        path.append(np.copy(xk))
-        iteration_count += 1
-        if np.allclose(np.round(np.abs(xk), 2), np.round(np.abs(func.global_min), 2)):
-            reach_min = True
-            raise StopOptimization
+# CMA-ES with restarts sharing one budget: iterations generations in total and, when set,
+# max_evaluations objective evaluations. After the first run from start_point every restart
+# begins at a uniform point inside the bounds.
+#   strategy='ipop'   each restart multiplies the population size by inc_popsize
+#   strategy='bipop'  alternates that large regime with small-population, small-sigma runs,
+#                     picking the regime that has used fewer evaluations so far
+# With workers > 1, rounds of that many independent restarts run in a process pool (the
+# function must be picklable) and their steps are replayed in restart order; such runs
+# cannot be checkpointed. Steps carry the best point sampled so far across all instances
+# as best_x, so the run ends there and not at the mean of the last (often fresh) instance.
+def restart_cma_steps(func, start_point, sigma=1.3, iterations=50, seed=None, executor=None, lr_adapt=False,
+                      strategy='ipop', inc_popsize=2, max_evaluations=None, workers=None, state=None):
+    assert strategy in ('ipop', 'bipop'), f"Unknown restart strategy {strategy!r}"
+    concurrent = workers is not None and workers > 1
+    if concurrent and state is not None:
+        raise ValueError('Concurrent restarts cannot be checkpointed')
+    state = {} if state is None else state
+    dim = len(start_point)
+    low, high = bounds_box(func.bounds, dim)
+    popsize0 = _default_popsize(dim)
+    if state:
+        rng, large, spent, instance = state['rng'], state['large'], state['spent'], state['instance']
+        evaluations, generations, current = state['evaluations'], state['generations'], state['current']
+        best_x, best_f = state['best_x'], state['best_f']
+    else:
+        rng = np.random.default_rng(seed)
+        large = instance = evaluations = generations = 0
+        spent = {'large': 0, 'small': 0}
+        current = None
+        best_x, best_f = None, np.inf
+    start = time.perf_counter() - state.get('elapsed', 0.0)
+
+    # (mean, sigma, popsize, seed, regime) of the next instance
+    def plan(slot, prefer_small):
+        nonlocal large, instance
+        mean = start_point if instance == 0 else rng.uniform(low, high)
+        instance += 1
+        if strategy == 'bipop' and instance > 1 and prefer_small != bool(slot % 2):
+            u = rng.random()
+            popsize = int(popsize0 * (0.5 * inc_popsize**large) ** (u**2))
+            return mean, sigma * 10 ** (-2 * rng.random()), max(popsize, 2), int(rng.integers(2**31 - 1)), 'small'
+        if instance > 1:
+            large += 1
+        return mean, sigma, popsize0 * inc_popsize**large, int(rng.integers(2**31 - 1)), 'large'
 
+    pool = ProcessPoolExecutor(workers) if concurrent else None
     try:
-        result = minimize(func, start_point, method='BFGS', options={'maxiter': iterations}, callback=callback)
-    except StopOptimization:
-        result = None 
-    
-    return np.array(path), reach_min, iteration_count, path[-1]
+        while generations < iterations and (max_evaluations is None or evaluations < max_evaluations):
+            remaining = None if max_evaluations is None else max_evaluations - evaluations
+            prefer_small = spent['small'] < spent['large']
+            if pool is not None:
+                configs = [plan(slot, prefer_small) for slot in range(workers)]
+                share = None if remaining is None else remaining // workers
+                futures = [pool.submit(_cma_instance_history, func, mean, s, popsize, instance_seed, lr_adapt,
+                                       iterations - generations, share) for mean, s, popsize, instance_seed, _ in configs]
+                runs = ((config[-1], future.result()) for config, future in zip(configs, futures))
+            else:
+                if current is None:
+                    current = {'config': plan(0, prefer_small), 'limits': (iterations - generations, remaining), 'state': {}}
+                mean, s, popsize, instance_seed, regime = current['config']
+                runs = [(regime, _cma_instance(func, mean, s, popsize, instance_seed, lr_adapt, *current['limits'],
+                                               executor, current['state']))]
 
-# Quasi-Newton (L-BFGS-B) optimizer
-def lbfgsb_optimization(func, start_point, iterations=50):
-    reach_min = False
-    iteration_count = 0
-    path = [start_point]
-
-    def callback(xk):
-        nonlocal reach_min, iteration_count
-        path.append(np.copy(xk))
-        iteration_count += 1
-        if np.allclose(np.round(np.abs(xk), 2), np.round(np.abs(func.global_min), 2)):
-            reach_min = True
+            round_evaluations = 0
+            for regime, history in runs:
+                used = current['state'].get('evaluations', 0) if pool is None else 0
+                for x, f, used, step_sigma, sample in history:
+                    generations += 1
+                    if best_x is None or f < best_f:
+                        best_x, best_f = sample, f
+                    elapsed = time.perf_counter() - start
+                    state.update(rng=rng, large=large, spent=spent, instance=instance, evaluations=evaluations,
+                                 generations=generations, current=current, best_x=best_x, best_f=best_f, elapsed=elapsed)
+                    yield Step(x, f, evaluations + used, elapsed, sigma=step_sigma, best_x=best_x, restarts=True)
+                    if generations >= iterations:
+                        break
+                evaluations += used
+                spent[regime] += used
+                round_evaluations += used
+                current = None
+                state.update(evaluations=evaluations, current=None)
+                if generations >= iterations:
+                    break
+            if round_evaluations == 0:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+# IPOP-CMA-ES steps
+def ipop_cma_steps(func, start_point, sigma=1.3, iterations=50, seed=None, executor=None, max_evaluations=None, workers=None,
+                   state=None):
+    yield from restart_cma_steps(func, start_point, sigma, iterations, seed, executor, strategy='ipop',
+                                 max_evaluations=max_evaluations, workers=workers, state=state)
+
+# BIPOP-CMA-ES steps
+def bipop_cma_steps(func, start_point, sigma=1.3, iterations=50, seed=None, executor=None, max_evaluations=None, workers=None,
+                    state=None):
+    yield from restart_cma_steps(func, start_point, sigma, iterations, seed, executor, strategy='bipop',
+                                 max_evaluations=max_evaluations, workers=workers, state=state)
+
+# Streams scipy.optimize.minimize iterations. minimize only reports progress through a
+# callback, so it runs on a helper thread that waits after every iteration until the
+# consumer asks for the next step; closing the generator stops the solver.
+# scipy does not expose the BFGS inverse Hessian or the L-BFGS-B memory mid-run, so a resumed
+# run restarts minimize from the last point and rebuilds them.
+def _scipy_steps(func, start_point, method, iterations, state=None):
+    from scipy.optimize import minimize
+    state = {} if state is None else state
+    x0 = state.get('x', np.array(start_point, dtype=float))
+    iteration = state.get('iteration', 0)
+    evaluations = state.get('evaluations', 0)
+    if iteration >= iterations:
+        return
+    start = time.perf_counter() - state.get('elapsed', 0.0)
+    fun, jac = _scipy_objective(func)
+    handoff = queue.Queue(maxsize=1)
+    resume = threading.Semaphore(0)
+    stopped = False
+
+    def counted(x):
+        nonlocal evaluations
+        evaluations += 1
+        return fun(x)
+
+    def callback(intermediate_result):
+        nonlocal iteration
+        iteration += 1
+        x = np.copy(intermediate_result.x)
+        elapsed = time.perf_counter() - start
+        state.update(x=x, iteration=iteration, evaluations=evaluations, elapsed=elapsed)
+        handoff.put(Step(x, intermediate_result.fun, evaluations, elapsed))
+        resume.acquire()
+        if stopped:
             raise StopOptimization
 
+    def solve():
+        try:
+            minimize(counted, x0, method=method, jac=jac, options={'maxiter': iterations - iteration}, callback=callback)
+        except StopOptimization:
+            pass
+        except Exception as error:
+            handoff.put(error)
+        handoff.put(None)
+
+    thread = threading.Thread(target=solve, daemon=True)
+    thread.start()
     try:
-        result = minimize(func, start_point, method='L-BFGS-B', options={'maxiter': iterations}, callback=callback)
-    except StopOptimization:
-        result = None  
-    
-    return np.array(path), reach_min, iteration_count, path[-1]
\ No newline at end of file
+        while True:
+            item = handoff.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+            resume.release()
+    finally:
+        if thread.is_alive():
+            stopped = True
+            resume.release()
+            while handoff.get() is not None:
+                pass
+
+# BFGS steps
+def bfgs_steps(func, start_point, iterations=50, state=None):
+    yield from _scipy_steps(func, start_point, 'BFGS', iterations, state)
+
+# Quasi-Newton (L-BFGS-B) steps
+def lbfgsb_steps(func, start_point, iterations=50, state=None):
+    yield from _scipy_steps(func, start_point, 'L-BFGS-B', iterations, state)
+
+# Drives a step generator until it ends or termination (a Termination, by default only the
+# known global minimum check) fires, recording the path into recorder (a Trajectory sized for
+# the whole run and stored in the function's dtype by default). termination.reason tells which criterion stopped the run.
+# With a checkpoint (checkpoint.Checkpoint) the run is saved periodically, and a checkpoint
+# loaded from disk continues with its saved recorder and termination instead of the given ones.
+# Returns (path, reach_min, opt_steps, end_point) with opt_steps the number of steps taken.
+def _run(func, start_point, steps, iterations, recorder=None, termination=None, checkpoint=None):
+    x = np.array(start_point, dtype=float)
+    opt_steps = 0
+    if checkpoint is not None and checkpoint.resuming:
+        recorder, termination, opt_steps, x = checkpoint.recorder, checkpoint.termination, checkpoint.steps, checkpoint.x
+    else:
+        if recorder is None:
+            recorder = Trajectory(len(x), capacity=iterations + 1, dtype=_dtype(func))
+        if termination is None:
+            termination = Termination()
+        termination.start(func, x)
+        recorder.record(x)
+    for opt_steps, step in enumerate(steps, opt_steps + 1):
+        recorder.record(step.x, step.f)
+        # The run's result: the last point, or the best point for steps that report one
+        x = step.x if step.best_x is None else step.best_x
+        stop = termination.check(step)
+        if checkpoint is not None:
+            checkpoint.step(opt_steps, x, recorder, termination)
+        if stop:
+            steps.close()
+            break
+    recorder.close()
+    if checkpoint is not None:
+        checkpoint.finish()
+    return recorder.array(), termination.reason == 'global_min', opt_steps, x
+
+# Optimizer state dict for a step generator, None without a checkpoint
+def _state(checkpoint):
+    return None if checkpoint is None else checkpoint.state
+
+# SGD optimizer
+def sgd_optimization(func, start_point, lr=0.05, iterations=50, recorder=None, termination=None, checkpoint=None):
+    steps = sgd_steps(func, start_point, lr, iterations, _state(checkpoint))
+    return _run(func, start_point, steps, iterations, recorder, termination, checkpoint)
+
+# Adam optimizer
+def adam_optimization(func, start_point, lr=0.05, beta1=0.9, beta2=0.999, epsilon=1e-8, iterations=50, recorder=None, termination=None,
+                      checkpoint=None):
+    steps = adam_steps(func, start_point, lr, beta1, beta2, epsilon, iterations, _state(checkpoint))
+    return _run(func, start_point, steps, iterations, recorder, termination, checkpoint)
+
+# CMA-ES
+def cmaes_optimization(func, start_point, sigma=1.3, iterations=50, seed=None, executor=None, recorder=None, termination=None,
+                       checkpoint=None):
+    steps = cmaes_steps(func, start_point, sigma, iterations, seed, executor, state=_state(checkpoint))
+    return _run(func, start_point, steps, iterations, recorder, termination, checkpoint)
+
+# LRA-CMA
+def lra_cma_optimization(func, start_point, sigma=1.3, iterations=50, seed=None, executor=None, recorder=None, termination=None,
+                         checkpoint=None):
+    steps = lra_cma_steps(func, start_point, sigma, iterations, seed, executor, _state(checkpoint))
+    return _run(func, start_point, steps, iterations, recorder, termination, checkpoint)
+
+# IPOP-CMA-ES
+def ipop_cma_optimization(func, start_point, sigma=1.3, iterations=50, seed=None, executor=None, max_evaluations=None,
+                          workers=None, recorder=None, termination=None, checkpoint=None):
+    steps = ipop_cma_steps(func, start_point, sigma, iterations, seed, executor, max_evaluations, workers, _state(checkpoint))
+    return _run(func, start_point, steps, iterations, recorder, termination, checkpoint)
+
+# BIPOP-CMA-ES
+def bipop_cma_optimization(func, start_point, sigma=1.3, iterations=50, seed=None, executor=None, max_evaluations=None,
+                           workers=None, recorder=None, termination=None, checkpoint=None):
+    steps = bipop_cma_steps(func, start_point, sigma, iterations, seed, executor, max_evaluations, workers, _state(checkpoint))
+    return _run(func, start_point, steps, iterations, recorder, termination, checkpoint)
+
+# BFGS optimizer
+def bfgs_optimization(func, start_point, iterations=50, recorder=None, termination=None, checkpoint=None):
+    steps = bfgs_steps(func, start_point, iterations, _state(checkpoint))
+    return _run(func, start_point, steps, iterations, recorder, termination, checkpoint)
+
+# Quasi-Newton (L-BFGS-B) optimizer
+def lbfgsb_optimization(func, start_point, iterations=50, recorder=None, termination=None, checkpoint=None):
+    steps = lbfgsb_steps(func, start_point, iterations, _state(checkpoint))
+    return _run(func, start_point, steps, iterations, recorder, termination, checkpoint)
+
+def _batch_paths(x, iterations, every):
+    # Rows for the start, every every-th step and the last step; every=None keeps only the end
+    rows = 1 if every is None else iterations // every + 1 + (iterations % every > 0)
+    paths = np.empty((rows,) + x.shape, dtype=x.dtype)
+    paths[0] = x
+    return paths
+
+def _batch_record(paths, every, step, x):
+    if every is not None and step % every == 0:
+        paths[step // every] = x
+
+def _batch_result(paths, every, steps, x):
+    if every is None:
+        paths[0] = x
+        return paths
+    kept = steps // every + 1
+    if steps % every:
+        paths[kept] = x
+        kept += 1
+    return paths[:kept]
+
+# Batched SGD: advances every row of an (N, dim) start matrix at once.
+# paths has shape (steps + 1, N, dim); lanes that stopped early repeat their last point.
+# every=k records only step 0, every k-th step and the last step, every=None only the final
+# points, so the paths buffer need not grow with iterations * N * dim.
+# Points, paths and updates are kept in the function's dtype.
+def sgd_optimization_batch(func, start_points, lr=0.05, iterations=50, every=1):
+    x = np.array(start_points, dtype=_dtype(func))
+    n = len(x)
+    reach_min = np.zeros(n, dtype=bool)
+    opt_steps = np.full(n, iterations)
+    active = np.ones(n, dtype=bool)
+    paths = _batch_paths(x, iterations, every)
+    steps = iterations
+    for step in range(iterations):
+        _, grad = _value_and_grad_batch(func, x[active])
+        x[active] -= lr * grad
+        _batch_record(paths, every, step + 1, x)
+        hit = active & _reached_min_batch(func, x)
+        reach_min |= hit
+        opt_steps[hit] = step + 1
+        active &= ~hit
+        if not active.any():
+            steps = step + 1
+            break
+    return _batch_result(paths, every, steps, x), reach_min, opt_steps, x
+
+# Batched Adam with per-lane moments, see sgd_optimization_batch for the result layout
+def adam_optimization_batch(func, start_points, lr=0.05, beta1=0.9, beta2=0.999, epsilon=1e-8, iterations=50, every=1):
+    x = np.array(start_points, dtype=_dtype(func))
+    n = len(x)
+    reach_min = np.zeros(n, dtype=bool)
+    opt_steps = np.full(n, iterations)
+    active = np.ones(n, dtype=bool)
+    paths = _batch_paths(x, iterations, every)
+    m = np.zeros_like(x)
+    v = np.zeros_like(x)
+    t = 0
+    for _ in range(iterations):
+        t += 1
+        _, grad = _value_and_grad_batch(func, x[active])
+        m[active] = beta1 * m[active] + (1 - beta1) * grad
+        v[active] = beta2 * v[active] + (1 - beta2) * grad**2
+        m_hat = m[active] / (1 - beta1**t)
+        v_hat = v[active] / (1 - beta2**t)
+        x[active] -= lr * m_hat / (np.sqrt(v_hat) + epsilon)
+        _batch_record(paths, every, t, x)
+        hit = active & _reached_min_batch(func, x)
+        reach_min |= hit
+        opt_steps[hit] = t
+        active &= ~hit
+        if not active.any():
+            break
+    return _batch_result(paths, every, t, x), reach_min, opt_steps, x
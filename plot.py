@@ -3,28 +3,28 @@ from matplotlib import pyplot as plt
 from matplotlib.ticker import LinearLocator, MaxNLocator
 from OppOpPopInit import OppositionOperators
 from utils.utils_funcs import get_good_arrow_place
+from surface import evaluate_grid
 
 def plot_3d(func, points_by_dim=50, title='', bounds=None, show_best_if_exists=True,
-            save_as=None, cmap='twilight', plot_surface=True, plot_heatmap=True, optimization_paths=None):
+            save_as=None, cmap='twilight', plot_surface=True, plot_heatmap=True, optimization_paths=None,
+            adaptive=False, grid=None, titles=('first dim', 'second dim')):
 
     assert plot_surface or plot_heatmap, "Should plot at least surface or heatmap!"
 
-    if bounds is None:
-        bounds = func.bounds
+    if grid is not None:
+        # Precomputed (x, y, data), e.g. a SliceSurface of a high-dimensional function
+        x, y, data = grid
+        bounds = (x[0], x[-1], y[0], y[-1])
+    else:
+        if bounds is None:
+            bounds = func.bounds
+        # 50 Points at each dimension by default, evaluated in one batch and cached
+        x, y, data = evaluate_grid(func, bounds, points_by_dim, adaptive=adaptive)
 
     xmin, xmax, ymin, ymax = bounds
 
-    # 50 Points at each dimension by default
-    x = np.linspace(xmin, xmax, points_by_dim)
-    y = np.linspace(ymin, ymax, points_by_dim)
-
     a, b = np.meshgrid(x, y)
 
-    data = np.empty((points_by_dim, points_by_dim))
-    for i in range(points_by_dim):
-        for j in range(points_by_dim):
-            data[i, j] = func(np.array([x[i], y[j]]))
-
     a = a.T
     b = b.T
 
@@ -58,8 +58,8 @@ def plot_3d(func, points_by_dim=50, title='', bounds=None, show_best_if_exists=T
 
     if plot_surface:
         surf = ax2.plot_surface(a, b, data, cmap=cmap, linewidth=0, antialiased=False)
-        ax2.set_xlabel('first dim', fontsize=10)
-        ax2.set_ylabel('second dim', fontsize=10)
+        ax2.set_xlabel(titles[0], fontsize=10)
+        ax2.set_ylabel(titles[1], fontsize=10)
         ax2.set_zlim(l_c, r_c)
         ax2.zaxis.set_major_locator(LinearLocator(4))
 
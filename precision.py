@@ -0,0 +1,74 @@
+import sys
+import time
+import argparse
+import numpy as np
+from math_funcs import FUNCTIONS, make_function
+from utils.utils_funcs import bounds_box
+from settings import FUNCTION_SEED
+
+# Accuracy of reduced-precision evaluation against the float64 reference.
+#   python precision.py --dims 2 100 1000 --points 4096
+# Per function and dim, the same seeded function is built in float64 and in --dtype and both
+# are evaluated on the same random points inside the bounds. Reported per row:
+#   value_error   largest |f32 - f64| relative to the range of f64 over the points
+#   grad_error    largest gradient error relative to the largest f64 gradient entry
+#   top_k         share of the float64 top-k points that the reduced ranking also keeps,
+#                 i.e. how safe it is to pre-screen in that precision
+#   memory        bytes of the function's arrays plus the batch values and gradients,
+#                 reduced over float64
+#   speedup       float64 over reduced batch evaluation time (value and gradient)
+
+def _nbytes(func):
+    return sum(value.nbytes for value in vars(func).values() if isinstance(value, np.ndarray))
+
+def _seconds(func, X, repeats=3):
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func.value_and_grad_batch(X)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def accuracy(name, dim, dtype='float32', points=1024, top=10, seed=0):
+    reference = make_function(name, dim, seed=FUNCTION_SEED)
+    reduced = make_function(name, dim, seed=FUNCTION_SEED, dtype=dtype)
+    low, high = bounds_box(reference.bounds, dim)
+    X = np.random.default_rng(seed).uniform(low, high, (points, dim))
+
+    values, grads = reference.value_and_grad_batch(X)
+    reduced_values, reduced_grads = reduced.value_and_grad_batch(X)
+    tiny = np.finfo(float).tiny
+    k = min(top, points)
+    kept = np.intersect1d(np.argsort(values)[:k], np.argsort(reduced_values)[:k])
+
+    return {
+        'function': name,
+        'dim': dim,
+        'dtype': np.dtype(dtype).name,
+        'value_error': float(np.max(np.abs(reduced_values - values)) / max(np.ptp(values), tiny)),
+        'grad_error': float(np.max(np.abs(reduced_grads - grads)) / max(np.max(np.abs(grads)), tiny)),
+        'top_k': len(kept) / k,
+        'memory': (_nbytes(reduced) + reduced_values.nbytes + reduced_grads.nbytes)
+                  / (_nbytes(reference) + values.nbytes + grads.nbytes),
+        'speedup': _seconds(reference, X) / _seconds(reduced, X)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare reduced-precision evaluation with float64')
+    parser.add_argument('--functions', nargs='+', default=list(FUNCTIONS), choices=list(FUNCTIONS))
+    parser.add_argument('--dims', nargs='+', type=int, default=[2, 100])
+    parser.add_argument('--dtype', default='float32')
+    parser.add_argument('--points', type=int, default=1024)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for dim in args.dims:
+        for name in args.functions:
+            r = accuracy(name, dim, args.dtype, args.points, args.top, args.seed)
+            print(f"{name:15s} dim={dim:<5d} value_error={r['value_error']:.1e} grad_error={r['grad_error']:.1e} "
+                  f"top_k={r['top_k']:.2f} memory={r['memory']:.2f} speedup={r['speedup']:.2f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import os
+import argparse
+from math_funcs import make_function
+from surface import save_grid
+from settings import APP_FUNCTIONS, DIM, FUNCTION_SEED, GRID_POINTS, ASSETS_DIR
+
+# Build-time step: renders the function thumbnails web.py shows and serializes the
+# background grids so a fresh container never evaluates them on the request path.
+#   python precompute.py [--out assets] [--points 70]
+
+def precompute(out=ASSETS_DIR, points_by_dim=GRID_POINTS):
+    from matplotlib import pyplot as plt
+    from plot import plot_3d
+
+    os.makedirs(out, exist_ok=True)
+    for name in APP_FUNCTIONS:
+        func = make_function(name, DIM, seed=FUNCTION_SEED)
+
+        save_grid(os.path.join(out, f'{name}_grid.npz'), func, points_by_dim=points_by_dim)
+
+        fig = plot_3d(func, points_by_dim=points_by_dim, title='', bounds=None,
+                      show_best_if_exists=False, save_as=os.path.join(out, f'{name}.png'), cmap='viridis',
+                      plot_surface=True, plot_heatmap=False)
+        plt.close(fig)
+        print(f'{name}: {out}/{name}.png, {out}/{name}_grid.npz')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute thumbnails and surface grids for the app')
+    parser.add_argument('--out', default=ASSETS_DIR)
+    parser.add_argument('--points', type=int, default=GRID_POINTS)
+    args = parser.parse_args()
+    precompute(args.out, args.points)
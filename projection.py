@@ -0,0 +1,82 @@
+import hashlib
+import numpy as np
+from utils.utils_funcs import bounds_box
+
+# 2-D views of high-dimensional paths. A Plane is x = origin + u * basis[:, 0] + v * basis[:, 1]
+# with the (u, v) window to draw; paths are shown by their plane coordinates and the background
+# is the function on the plane (surface.SliceSurface).
+#   coordinate_plane  slice through a point along two coordinates (u, v are those coordinates)
+#   pca_plane         the two principal directions of a set of path points, through their mean
+
+class Plane:
+
+    def __init__(self, origin, basis, limits, titles=('first dim', 'second dim')):
+
+        self.origin = np.asarray(origin, dtype=float)
+        self.basis = np.asarray(basis, dtype=float)
+        # (u_min, u_max, v_min, v_max), laid out like function bounds
+        self.limits = tuple(float(l) for l in limits)
+        self.titles = titles
+        self.key = hashlib.sha1(self.origin.tobytes() + self.basis.tobytes() + np.array(self.limits).tobytes()).hexdigest()
+
+    def project(self, X):
+
+        return (np.asarray(X, dtype=float) - self.origin) @ self.basis
+
+    def lift(self, U):
+
+        return self.origin + np.asarray(U, dtype=float) @ self.basis.T
+
+def _finite(points):
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    return points[np.all(np.isfinite(points), axis=1)]
+
+def coordinate_plane(point, axes, bounds):
+    # Slice through point varying coordinates axes = (i, j) over their bounds
+    i, j = axes
+    origin = np.array(point, dtype=float)
+    origin[[i, j]] = 0.0
+    basis = np.zeros((len(origin), 2))
+    basis[i, 0] = basis[j, 1] = 1.0
+    low, high = bounds_box(bounds, len(origin))
+    return Plane(origin, basis, (low[i], high[i], low[j], high[j]), (f'dim {i + 1}', f'dim {j + 1}'))
+
+def spread_axes(points):
+    # The two coordinates the points vary most along
+    points = _finite(points)
+    order = np.argsort(-np.var(points, axis=0), kind='stable')
+    return tuple(sorted(int(a) for a in order[:2]))
+
+def steepest_axes(func, point):
+    # The two coordinates with the largest gradient at point, where the optimizers move first
+    if not hasattr(func, 'grad'):
+        return (0, 1)
+    order = np.argsort(-np.abs(func.grad(np.asarray(point, dtype=float))), kind='stable')
+    return tuple(sorted(int(a) for a in order[:2]))
+
+def pca_plane(points, pad=0.25):
+    # Window: the projected points padded by pad of their extent on every side
+    points = _finite(points)
+    origin = points.mean(axis=0)
+    _, _, vt = np.linalg.svd(points - origin, full_matrices=False)
+    basis = np.zeros((points.shape[1], 2))
+    basis[:, :min(2, len(vt))] = vt[:2].T
+    for k in range(2):
+        # Fewer than two directions of spread: complete with coordinate axes
+        if np.linalg.norm(basis[:, k]) < 0.5:
+            for axis in range(points.shape[1]):
+                e = np.zeros(points.shape[1])
+                e[axis] = 1.0
+                e -= basis @ (basis.T @ e)
+                if np.linalg.norm(e) > 1e-6:
+                    basis[:, k] = e / np.linalg.norm(e)
+                    break
+        # Deterministic sign: the largest entry positive
+        if basis[np.argmax(np.abs(basis[:, k])), k] < 0:
+            basis[:, k] = -basis[:, k]
+
+    U = (points - origin) @ basis
+    low, high = U.min(axis=0), U.max(axis=0)
+    margin = np.maximum(pad * (high - low), 0.5)
+    return Plane(origin, basis, (low[0] - margin[0], high[0] + margin[0], low[1] - margin[1], high[1] + margin[1]),
+                 ('first principal direction', 'second principal direction'))
@@ -0,0 +1,60 @@
+import threading
+import numpy as np
+from cachetools import TTLCache
+
+class ResultCache:
+
+    # Process-wide cache of optimizer results with size- and TTL-based eviction.
+    # Cached arrays are made read-only because every caller shares the same objects.
+
+    def __init__(self, maxsize=512, ttl=3600):
+
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(function, optimizer, params, start_point, seed=None, dim=2):
+
+        params = tuple(sorted((name, float(value)) for name, value in params.items()))
+        start_point = tuple(float(x) for x in np.ravel(start_point))
+
+        return (function, optimizer, params, start_point, seed, dim)
+
+    def get_or_compute(self, key, compute):
+
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        # Computed outside the lock so slow runs do not serialize other requests
+        result = compute()
+        for value in result:
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+        with self._lock:
+            self._cache[key] = result
+        return result
+
+    def stats(self):
+
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._cache),
+                'maxsize': self._cache.maxsize,
+                'ttl': self._cache.ttl
+            }
+
+    def clear(self):
+
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import hashlib
+import numpy as np
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from optimizers import sgd_optimization, adam_optimization, cmaes_optimization, lra_cma_optimization, bfgs_optimization, lbfgsb_optimization
+from optimizers import ipop_cma_optimization, bipop_cma_optimization
+from optimizers import sgd_steps, adam_steps, cmaes_steps, lra_cma_steps, bfgs_steps, lbfgsb_steps, ipop_cma_steps, bipop_cma_steps
+from math_funcs import make_function
+from utils.utils_funcs import bounds_box
+from termination import Termination
+from checkpoint import Checkpoint
+from memo import memoize
+from settings import MATRIX_DIR, CHECKPOINT_DIR
+
+OPTIMIZERS = {
+    'SGD': sgd_optimization,
+    'Adam': adam_optimization,
+    'CMA-ES': cmaes_optimization,
+    'LRA-CMA': lra_cma_optimization,
+    'IPOP-CMA': ipop_cma_optimization,
+    'BIPOP-CMA': bipop_cma_optimization,
+    'BFGS': bfgs_optimization,
+    'L-BFGS-B': lbfgsb_optimization
+}
+
+STEPS = {
+    'SGD': sgd_steps,
+    'Adam': adam_steps,
+    'CMA-ES': cmaes_steps,
+    'LRA-CMA': lra_cma_steps,
+    'IPOP-CMA': ipop_cma_steps,
+    'BIPOP-CMA': bipop_cma_steps,
+    'BFGS': bfgs_steps,
+    'L-BFGS-B': lbfgsb_steps
+}
+
+# Optimizers that draw random numbers and accept a seed
+SEEDED_OPTIMIZERS = {'CMA-ES', 'LRA-CMA', 'IPOP-CMA', 'BIPOP-CMA'}
+
+def make_grid(functions, optimizers, start_points, seeds, params=None, dim=2, termination=None, dtype='float64'):
+    # One task per combination; params maps optimizer name -> keyword arguments and
+    # termination holds Termination keyword arguments shared by every task.
+    # A start point of None is sampled inside the function bounds from the task seed.
+    # dtype is the evaluation precision of the functions (see math_funcs).
+    params = params or {}
+    tasks = []
+    for func, opt, start_point, seed in product(functions, optimizers, start_points, seeds):
+        tasks.append({
+            'function': func,
+            'optimizer': opt,
+            'params': dict(params.get(opt, {})),
+            'start_point': None if start_point is None else list(start_point),
+            'seed': seed,
+            'dim': dim,
+            'termination': dict(termination or {}),
+            'dtype': np.dtype(dtype).name
+        })
+    return tasks
+
+def task_streams(seed):
+    # Independent streams for function construction and for the optimizer / start point,
+    # derived only from the task seed so results do not depend on scheduling
+    func_ss, opt_ss = np.random.SeedSequence(seed).spawn(2)
+    return int(func_ss.generate_state(1)[0]), np.random.default_rng(opt_ss)
+
+def prepare_task(task):
+    # The function instance, start point and optimizer keyword arguments of a task
+    func_seed, rng = task_streams(task['seed'])
+    func = make_function(task['function'], task['dim'], seed=func_seed, storage=MATRIX_DIR, dtype=task.get('dtype', 'float64'))
+    func = memoize(func)
+
+    if task['start_point'] is None:
+        low, high = bounds_box(func.bounds, task['dim'])
+        start_point = rng.uniform(low, high)
+    else:
+        start_point = np.array(task['start_point'], dtype=float)
+
+    params = dict(task['params'])
+    if task['optimizer'] in SEEDED_OPTIMIZERS:
+        params.setdefault('seed', int(rng.integers(2**31 - 1)))
+
+    return func, start_point, params
+
+def task_checkpoint(task, index=None, directory=CHECKPOINT_DIR):
+    # Checkpoint file of a task, named after its content and its index in the grid so a rerun
+    # of the same grid resumes it while duplicate tasks in one grid never share a file
+    if directory is None:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    key = hashlib.sha1(json.dumps([task, index], sort_keys=True, default=str).encode()).hexdigest()
+    return Checkpoint(os.path.join(directory, f'{key}.ckpt'), every=100, seconds=60)
+
+def run_task(task, index=None):
+    func, start_point, params = prepare_task(task)
+    termination = Termination(**task.get('termination', {}))
+    # Concurrent CMA restarts cannot be checkpointed
+    checkpoint = task_checkpoint(task, index) if (params.get('workers') or 1) <= 1 else None
+    if checkpoint is not None:
+        params['checkpoint'] = checkpoint
+        # A resumed run reports the restored termination's stop reason
+        termination = checkpoint.termination or termination
+
+    start = time.perf_counter()
+    path, reach_min, opt_steps, end_point = OPTIMIZERS[task['optimizer']](func, start_point.copy(), termination=termination, **params)
+    elapsed = time.perf_counter() - start
+
+    result = dict(task)
+    result.update({
+        'start_point': start_point,
+        'path': path,
+        'reach_min': bool(reach_min),
+        'opt_steps': int(opt_steps),
+        'stop_reason': termination.reason,
+        'end_point': np.asarray(end_point),
+        'end_value': float(func(end_point)),
+        'elapsed': elapsed
+    })
+    return result
+
+def run_grid(tasks, executor='process', max_workers=None, max_pending=None):
+    # Yields results as they finish, not in task order; each result carries its task index.
+    # executor is 'process', 'thread', 'serial' or an existing concurrent.futures executor.
+    # At most max_pending tasks are in flight so very large grids stay bounded in memory.
+    if executor == 'serial':
+        for index, task in enumerate(tasks):
+            yield dict(run_task(task, index), index=index)
+        return
+
+    if executor == 'process':
+        pool = ProcessPoolExecutor(max_workers)
+    elif executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers)
+    else:
+        pool = executor
+
+    max_pending = max_pending or 4 * (max_workers or os.cpu_count() or 1)
+    pending = {}
+    tasks = iter(enumerate(tasks))
+    try:
+        while True:
+            for index, task in tasks:
+                pending[pool.submit(run_task, task, index)] = index
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                yield dict(future.result(), index=index)
+    finally:
+        for future in pending:
+            future.cancel()
+        if pool is not executor:
+            pool.shutdown()
@@ -0,0 +1,34 @@
+import os
+
+# Settings shared by the Streamlit app and the build-time precompute step
+
+# Problem dimension shown in the app by default, and the dimensions to choose from.
+# Above 2 the paths are drawn on a 2-D projection (slice or PCA)
+DIM = 2
+DIMS = (2, 10, 50, 100, 500, 1000)
+
+# Functions offered in the app, with a thumbnail each. FletcherPowell is for batch runs only
+APP_FUNCTIONS = ('Ackley', 'Rastrigin', 'Rosenbrock', 'Fletcher', 'Michalewicz')
+
+# Fixed seeds so identical requests from any session share cached results
+FUNCTION_SEED = 0
+RUN_SEED = 0
+
+# Background optimization jobs: running at once per server, and waiting beyond that
+MAX_JOB_WORKERS = 2
+MAX_QUEUED_JOBS = 8
+
+# Resolution of the background grids
+GRID_POINTS = 70
+
+# Nodes per side of the projected contours above 2 dims; bounds their evaluations per plane
+SLICE_POINTS = 48
+
+# Thumbnails and serialized grids written by precompute.py
+ASSETS_DIR = 'assets'
+
+# Directory for memory-mapped FletcherPowell matrices in batch runs (in memory when unset)
+MATRIX_DIR = os.environ.get('FASTOPT_MATRIX_DIR')
+
+# Directory for batch-run checkpoints; preempted runner tasks resume from here (off when unset)
+CHECKPOINT_DIR = os.environ.get('FASTOPT_CHECKPOINT_DIR')
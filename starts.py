@@ -0,0 +1,72 @@
+import numpy as np
+from utils.utils_funcs import bounds_box
+
+# Multi-start point generation inside a function's bounds, with an optional cheap pre-screening
+# pass that batch-evaluates the candidates and keeps the k best as starts.
+#   uniform           independent uniform points
+#   lhs               Latin hypercube: every coordinate hits each of n equal strata once
+#   opposition        uniform points plus their opposites low + high - x (OppOpPopInit abs)
+#   quasi_reflection  uniform points plus a uniform point between each one and the box centre
+# Opposite pairs cover the box symmetrically, so when one point of a pair lies far from the
+# global basin the other tends to lie closer; screening then keeps the better half.
+SCHEMES = ('uniform', 'lhs', 'opposition', 'quasi_reflection')
+
+# Rows per evaluate_batch call while screening, so large candidate sets stay bounded in memory
+SCREEN_BATCH = 1024
+
+def _latin_hypercube(rng, low, high, n):
+    strata = rng.permuted(np.tile(np.arange(n), (len(low), 1)), axis=1).T
+    return low + (strata + rng.random((n, len(low)))) / n * (high - low)
+
+def _half_and_reflection(rng, low, high, n, reflect):
+    # ceil(n / 2) uniform points followed by the reflections of the first floor(n / 2)
+    base = rng.uniform(low, high, ((n + 1) // 2, len(low)))
+    return np.vstack([base, reflect(base[:n // 2])])
+
+def candidate_points(bounds, dim, n, scheme='opposition', seed=0):
+    # (n, dim) points inside bounds (x_min, x_max, y_min, y_max, coordinates past the second
+    # use the first axis range, see bounds_box); seed is anything np.random.default_rng takes
+    if scheme not in SCHEMES:
+        raise ValueError(f'Unknown start scheme {scheme!r}, expected one of {SCHEMES}')
+    rng = np.random.default_rng(seed)
+    low, high = bounds_box(bounds, dim)
+
+    if scheme == 'uniform':
+        return rng.uniform(low, high, (n, dim))
+    if scheme == 'lhs':
+        return _latin_hypercube(rng, low, high, n)
+    if scheme == 'opposition':
+        from OppOpPopInit import OppositionOperators
+        # abs opposition is elementwise, so it reflects a whole (n, dim) block at once
+        return _half_and_reflection(rng, low, high, n, OppositionOperators.Continual.abs(low, high))
+
+    # OppOpPopInit's quasi_reflect draws from the global random module one coordinate at a
+    # time; the same operator vectorized on the local stream keeps runs reproducible
+    centre = (low + high) / 2
+    return _half_and_reflection(rng, low, high, n, lambda X: rng.uniform(np.minimum(X, centre), np.maximum(X, centre)))
+
+def screen(func, candidates, k):
+    # The k candidates with the lowest objective values, best first, and their values.
+    # Candidates are evaluated in batches; non-finite values rank last.
+    candidates = np.asarray(candidates, dtype=float)
+    values = np.empty(len(candidates))
+    for start in range(0, len(candidates), SCREEN_BATCH):
+        block = candidates[start:start + SCREEN_BATCH]
+        if hasattr(func, 'evaluate_batch'):
+            values[start:start + len(block)] = func.evaluate_batch(block)
+        else:
+            values[start:start + len(block)] = [func(x) for x in block]
+    values = np.where(np.isfinite(values), values, np.inf)
+
+    k = min(k, len(candidates))
+    best = np.argpartition(values, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+    best = best[np.argsort(values[best], kind='stable')]
+    return candidates[best], values[best]
+
+def make_starts(func, dim, k, scheme='opposition', candidates=None, seed=0):
+    # k start points for func; with candidates (> k) that many are generated and screened
+    # down to the best k, otherwise the k generated points are returned as they are
+    points = candidate_points(func.bounds, dim, max(candidates or k, k), scheme, seed)
+    if candidates is None or candidates <= k:
+        return points
+    return screen(func, points, k)[0]
@@ -0,0 +1,75 @@
+import os
+import ast
+import sys
+import json
+import subprocess
+
+# Cold-start timing report: each measurement runs in a fresh interpreter so nothing is
+# already imported.
+#   python startup_report.py
+
+def startup_imports(path='web.py'):
+    # What web.py imports at the top level, i.e. before the first paint, read from its source
+    # so the report follows the app; `from utils import icon` counts as the module utils.icon
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                local = os.path.join(*node.module.split('.'), f'{alias.name}.py')
+                modules.append(f'{node.module}.{alias.name}' if os.path.exists(local) else node.module)
+    return list(dict.fromkeys(modules))
+
+STARTUP_IMPORTS = startup_imports()
+
+# Dependencies that should only load when an optimization or a plot is requested
+HEAVY_IMPORTS = ['scipy.optimize', 'cmaes', 'matplotlib.pyplot', 'OppOpPopInit', 'altair', 'pandas', 'plot', 'chart']
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+GRID_PROBE = """
+import time, json
+from math_funcs import make_function
+from settings import APP_FUNCTIONS, DIM, FUNCTION_SEED, GRID_POINTS, ASSETS_DIR
+import surface
+start = time.perf_counter()
+loaded = surface.load_grids(ASSETS_DIR)
+load = time.perf_counter() - start
+surface.clear_grid_cache()
+start = time.perf_counter()
+for name in APP_FUNCTIONS:
+    surface.evaluate_grid(make_function(name, DIM, seed=FUNCTION_SEED), points_by_dim=GRID_POINTS)
+compute = time.perf_counter() - start
+print(json.dumps({'loaded': loaded, 'load': load, 'compute': compute}))
+"""
+
+def probe(code):
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def report():
+    startup = probe(PROBE.format(modules=STARTUP_IMPORTS, heavy=HEAVY_IMPORTS))
+    print(f"start-up imports: {startup['seconds'] * 1000:8.1f} ms")
+    print(f"heavy modules loaded at start-up: {', '.join(startup['loaded']) or 'none'}")
+
+    print('deferred imports (each in a fresh interpreter):')
+    for name in HEAVY_IMPORTS:
+        timing = probe(PROBE.format(modules=[name], heavy=[]))
+        print(f"  {name:20s} {timing['seconds'] * 1000:8.1f} ms")
+
+    grids = probe(GRID_PROBE)
+    print(f"background grids: {grids['loaded']} precomputed loaded in {grids['load'] * 1000:.1f} ms, "
+          f"computing them takes {grids['compute'] * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    report()
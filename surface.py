@@ -0,0 +1,215 @@
+import os
+import glob
+import threading
+import numpy as np
+from cachetools import LRUCache
+from utils.utils_funcs import fingerprint
+
+GRID_CACHE_SIZE = 32
+SLICE_CACHE_SIZE = 16
+
+# Adaptive grids that would evaluate more than this share of the points anyway (rugged
+# functions such as Rastrigin) evaluate all of them, so they are exact at uniform-grid cost
+ADAPTIVE_MAX_FRACTION = 0.75
+
+_cache = LRUCache(maxsize=GRID_CACHE_SIZE)
+_slices = LRUCache(maxsize=SLICE_CACHE_SIZE)
+_lock = threading.Lock()
+
+def _evaluate_points(func, points):
+    # Values stay in the function's dtype, so a float32 function gives a float32 grid
+    dtype = getattr(func, 'dtype', float)
+    if hasattr(func, 'evaluate_batch'):
+        return np.asarray(func.evaluate_batch(points), dtype=dtype)
+    return np.array([func(p) for p in points], dtype=dtype)
+
+def _grid_points(x, y, rows, cols):
+    a, b = np.meshgrid(x[rows], y[cols], indexing='ij')
+    return np.column_stack([a.ravel(), b.ravel()])
+
+def _uniform_grid(func, x, y):
+    n = len(x)
+    return _evaluate_points(func, _grid_points(x, y, np.arange(n), np.arange(n))).reshape(n, n)
+
+def _adaptive_grid(func, x, y, block, tolerance):
+    # Evaluates a coarse lattice every `block` points plus the centre of each coarse cell,
+    # bilinearly interpolates the fine grid, then re-evaluates exactly only the cells whose
+    # corner spread or centre interpolation error exceeds tolerance * (global range), or every
+    # point past ADAPTIVE_MAX_FRACTION. No point is evaluated twice.
+    n = len(x)
+    nodes = np.unique(np.append(np.arange(0, n, block), n - 1))
+    coarse = _evaluate_points(func, _grid_points(x, y, nodes, nodes)).reshape(len(nodes), len(nodes))
+
+    cell = np.clip(np.searchsorted(nodes, np.arange(n), 'right') - 1, 0, len(nodes) - 2)
+    t = (np.arange(n) - nodes[cell]) / (nodes[cell + 1] - nodes[cell])
+    c00 = coarse[np.ix_(cell, cell)]
+    c10 = coarse[np.ix_(cell + 1, cell)]
+    c01 = coarse[np.ix_(cell, cell + 1)]
+    c11 = coarse[np.ix_(cell + 1, cell + 1)]
+    u, v = t[:, None], t[None, :]
+    data = (1 - u) * (1 - v) * c00 + u * (1 - v) * c10 + (1 - u) * v * c01 + u * v * c11
+
+    centres = (nodes[:-1] + nodes[1:]) // 2
+    # The centre of a one-wide cell is its first node; where both coordinates are nodes the
+    # coarse value is reused rather than evaluated again
+    on_node = np.isin(centres, nodes)
+    repeated = np.outer(on_node, on_node).ravel()
+    points = _grid_points(x, y, centres, centres)
+    exact = np.empty(len(points), dtype=coarse.dtype)
+    exact[~repeated] = _evaluate_points(func, points[~repeated])
+    at = np.searchsorted(nodes, centres[on_node])
+    exact[repeated] = coarse[np.ix_(at, at)].ravel()
+    exact = exact.reshape(len(centres), len(centres))
+    error = np.abs(exact - data[np.ix_(centres, centres)])
+    corners = np.stack([coarse[:-1, :-1], coarse[1:, :-1], coarse[:-1, 1:], coarse[1:, 1:]])
+    spread = corners.max(axis=0) - corners.min(axis=0)
+
+    scale = max(np.ptp(coarse), np.ptp(exact), np.finfo(float).tiny)
+    sharp = (error > tolerance * scale) | (spread > 4 * tolerance * scale)
+    refine = np.zeros((n, n), dtype=bool)
+    for k, l in zip(*np.nonzero(sharp)):
+        refine[nodes[k]:nodes[k + 1] + 1, nodes[l]:nodes[l + 1] + 1] = True
+    known = np.zeros((n, n), dtype=bool)
+    known[np.ix_(nodes, nodes)] = known[np.ix_(centres, centres)] = True
+    if known.sum() + (refine & ~known).sum() > ADAPTIVE_MAX_FRACTION * n * n:
+        refine[:] = True
+    refine &= ~known
+
+    rows, cols = np.nonzero(refine)
+    if len(rows):
+        data[rows, cols] = _evaluate_points(func, np.column_stack([x[rows], y[cols]]))
+    data[np.ix_(nodes, nodes)] = coarse
+    data[np.ix_(centres, centres)] = exact
+    return data.astype(coarse.dtype, copy=False)
+
+def _key(func_key, bounds, points_by_dim, adaptive=False, block=4, tolerance=0.02):
+    return (func_key, tuple(float(b) for b in bounds), int(points_by_dim), adaptive, block, tolerance)
+
+def evaluate_grid(func, bounds=None, points_by_dim=50, adaptive=False, block=4, tolerance=0.02, use_cache=True):
+    # Returns x, y and data with data[i, j] = func([x[i], y[j]]), evaluated in batch calls.
+    # Results are cached (LRU) on the function's parameters, bounds and resolution and are
+    # read-only. adaptive=True samples smooth regions coarsely and interpolates them.
+    if bounds is None:
+        bounds = func.bounds
+    xmin, xmax, ymin, ymax = bounds
+
+    key = _key(fingerprint(func), bounds, points_by_dim, adaptive, block, tolerance)
+    if use_cache:
+        with _lock:
+            hit = _cache.get(key)
+        if hit is not None:
+            return hit
+
+    x = np.linspace(xmin, xmax, points_by_dim)
+    y = np.linspace(ymin, ymax, points_by_dim)
+    if adaptive and points_by_dim > 2 * block:
+        data = _adaptive_grid(func, x, y, block, tolerance)
+    else:
+        data = _uniform_grid(func, x, y)
+
+    for array in (x, y, data):
+        array.flags.writeable = False
+    if use_cache:
+        with _lock:
+            _cache[key] = (x, y, data)
+    return x, y, data
+
+def clear_grid_cache():
+    with _lock:
+        _cache.clear()
+        _slices.clear()
+
+class SliceSurface:
+
+    # func on a projection.Plane, on a lattice of max_points x max_points nodes over the plane
+    # limits. cover() grows the evaluated window (a rectangle of nodes) to take in new points,
+    # such as the path points of a running optimizer, and evaluates only the nodes it adds, in
+    # one batch call. Every node is evaluated at most once, so a whole surface costs at most
+    # max_points**2 evaluations whatever the dimension.
+
+    def __init__(self, func, plane, max_points=48):
+
+        self.func = func
+        self.plane = plane
+        umin, umax, vmin, vmax = plane.limits
+        self.u = np.linspace(umin, umax, max_points)
+        self.v = np.linspace(vmin, vmax, max_points)
+        self.data = np.full((max_points, max_points), np.nan)
+        self.window = None
+        self.evaluations = 0
+        self._lock = threading.Lock()
+
+    def cover(self, points=None, margin=4):
+
+        # Extends the window to every finite point (and margin nodes around it); without
+        # points the whole lattice is covered. Returns the number of nodes evaluated.
+        n = len(self.u)
+        if points is None:
+            wanted = (0, n, 0, n)
+        else:
+            points = np.atleast_2d(np.asarray(points, dtype=float))
+            points = points[np.all(np.isfinite(points), axis=1)]
+            if not len(points):
+                return 0
+            U = self.plane.project(points)
+            i = np.searchsorted(self.u, U[:, 0])
+            j = np.searchsorted(self.v, U[:, 1])
+            wanted = (max(int(i.min()) - margin, 0), min(int(i.max()) + margin + 1, n),
+                      max(int(j.min()) - margin, 0), min(int(j.max()) + margin + 1, n))
+            if wanted[0] >= wanted[1] or wanted[2] >= wanted[3]:
+                return 0
+
+        with self._lock:
+            old = self.window
+            if old is not None:
+                wanted = (min(old[0], wanted[0]), max(old[1], wanted[1]), min(old[2], wanted[2]), max(old[3], wanted[3]))
+                if wanted == old:
+                    return 0
+            todo = np.zeros((n, n), dtype=bool)
+            todo[wanted[0]:wanted[1], wanted[2]:wanted[3]] = True
+            if old is not None:
+                todo[old[0]:old[1], old[2]:old[3]] = False
+            rows, cols = np.nonzero(todo)
+            points = self.plane.lift(np.column_stack([self.u[rows], self.v[cols]]))
+            self.data[rows, cols] = _evaluate_points(self.func, points)
+            self.evaluations += len(rows)
+            self.window = wanted
+            return len(rows)
+
+    def grid(self):
+
+        # x, y and data of the covered window, laid out like evaluate_grid
+        with self._lock:
+            i0, i1, j0, j1 = self.window or (0, 0, 0, 0)
+            return self.u[i0:i1].copy(), self.v[j0:j1].copy(), self.data[i0:i1, j0:j1].copy()
+
+def slice_surface(func, plane, max_points=48):
+    # The SliceSurface of func on plane, shared across reruns and sessions through an LRU cache
+    key = (fingerprint(func), plane.key, int(max_points))
+    with _lock:
+        surface = _slices.get(key)
+        if surface is None:
+            surface = _slices[key] = SliceSurface(func, plane, max_points)
+    return surface
+
+def save_grid(filename, func, bounds=None, points_by_dim=50):
+    # Stores a uniform grid with the function fingerprint so load_grids can seed the cache
+    if bounds is None:
+        bounds = func.bounds
+    x, y, data = evaluate_grid(func, bounds, points_by_dim)
+    np.savez_compressed(filename, x=x, y=y, data=data, fingerprint=fingerprint(func), bounds=np.asarray(bounds, dtype=float))
+
+def load_grids(directory):
+    # Puts every *_grid.npz written by save_grid into the cache; returns how many were loaded.
+    # A grid is only ever served to a function with the same fingerprint.
+    loaded = 0
+    for filename in sorted(glob.glob(os.path.join(directory, '*_grid.npz'))):
+        with np.load(filename) as stored:
+            x, y, data = stored['x'], stored['y'], stored['data']
+            key = _key(str(stored['fingerprint']), stored['bounds'], len(x))
+        for array in (x, y, data):
+            array.flags.writeable = False
+        with _lock:
+            _cache[key] = (x, y, data)
+        loaded += 1
+    return loaded
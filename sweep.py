@@ -0,0 +1,186 @@
+import sys
+import argparse
+import numpy as np
+from itertools import islice, product
+from math_funcs import FUNCTIONS, make_function
+from runner import STEPS, SEEDED_OPTIMIZERS
+from settings import FUNCTION_SEED
+from starts import SCHEMES, make_starts
+
+# Hyperparameter sweeps with successive halving.
+#   python sweep.py --function Ackley --optimizer SGD --space lr=loguniform:1e-4:1 --samples 27
+#   python sweep.py --function Rastrigin --optimizer CMA-ES --space sigma=0.3,1,3 --hyperband
+# Every configuration is a set of live step generators (one per start point). A rung advances
+# them by a few iterations, the worse configurations are dropped and the survivors continue
+# from where they stopped instead of restarting, up to max_iterations.
+
+# Parameter spaces worth tuning per optimizer
+DEFAULT_SPACES = {
+    'SGD': {'lr': ('loguniform', 1e-4, 1.0)},
+    'Adam': {'lr': ('loguniform', 1e-4, 1.0)},
+    'CMA-ES': {'sigma': ('loguniform', 0.05, 5.0)},
+    'LRA-CMA': {'sigma': ('loguniform', 0.05, 5.0)},
+    'IPOP-CMA': {'sigma': ('loguniform', 0.05, 5.0)},
+    'BIPOP-CMA': {'sigma': ('loguniform', 0.05, 5.0)}
+}
+
+def sample_configs(space, n=None, seed=0):
+    # A list is a grid axis, ('uniform', low, high) and ('loguniform', low, high) are sampled.
+    # Without n every entry must be a list and the full grid is returned. A grid-only space
+    # is sampled without replacement, so n past the grid size gives every grid point once.
+    if n is None:
+        return [dict(zip(space, values)) for values in product(*space.values())]
+
+    rng = np.random.default_rng(seed)
+    if all(isinstance(dist, list) for dist in space.values()):
+        grid = sample_configs(space)
+        return [grid[i] for i in rng.permutation(len(grid))[:n]]
+
+    configs = []
+    for _ in range(n):
+        config = {}
+        for name, dist in space.items():
+            if isinstance(dist, list):
+                config[name] = dist[rng.integers(len(dist))]
+            elif dist[0] == 'uniform':
+                config[name] = float(rng.uniform(dist[1], dist[2]))
+            elif dist[0] == 'loguniform':
+                config[name] = float(np.exp(rng.uniform(np.log(dist[1]), np.log(dist[2]))))
+            else:
+                raise ValueError(f'Unknown distribution {dist[0]!r} for {name}')
+        configs.append(config)
+    return configs
+
+def _advance(candidate, iterations):
+    for i, steps in enumerate(candidate['runs']):
+        for step in islice(steps, iterations):
+            if step.f < candidate['best'][i]:
+                candidate['best'][i] = float(step.f)
+            candidate['evaluations'][i] = step.evaluations
+    candidate['iterations'] += iterations
+
+def _score(candidate):
+    # Mean best value over the start points; diverged runs score inf
+    best = np.array(candidate['best'])
+    return float(np.mean(np.where(np.isfinite(best), best, np.inf)))
+
+def successive_halving(func, optimizer, configs, start_points, min_iterations=10, max_iterations=270, eta=3, seed=0):
+    # Returns one summary per configuration, best first; pruned_at is the iteration count at
+    # which a configuration was dropped, None for the ones that ran to max_iterations
+    candidates = []
+    for params in configs:
+        runs = []
+        for k, start_point in enumerate(start_points):
+            kwargs = dict(params, iterations=max_iterations)
+            if optimizer in SEEDED_OPTIMIZERS:
+                kwargs.setdefault('seed', seed + k)
+            runs.append(STEPS[optimizer](func, np.array(start_point, dtype=float), **kwargs))
+        candidates.append({
+            'params': params, 'runs': runs, 'iterations': 0, 'pruned_at': None,
+            'best': [np.inf] * len(runs), 'evaluations': [0] * len(runs)
+        })
+
+    alive = candidates
+    budget = min(min_iterations, max_iterations)
+    try:
+        while True:
+            for candidate in alive:
+                _advance(candidate, budget - candidate['iterations'])
+            if budget >= max_iterations:
+                break
+            alive.sort(key=_score)
+            keep = max(1, len(alive) // eta)
+            for candidate in alive[keep:]:
+                candidate['pruned_at'] = budget
+                for steps in candidate['runs']:
+                    steps.close()
+            alive = alive[:keep]
+            budget = min(budget * eta, max_iterations)
+    finally:
+        for candidate in candidates:
+            for steps in candidate['runs']:
+                steps.close()
+
+    results = [{
+        'params': c['params'],
+        'score': _score(c),
+        'iterations': c['iterations'],
+        'evaluations': int(sum(c['evaluations'])),
+        'pruned_at': c['pruned_at']
+    } for c in candidates]
+    return sorted(results, key=lambda r: (-r['iterations'], r['score']))
+
+def hyperband(func, optimizer, space, start_points, max_iterations=270, eta=3, seed=0):
+    # Brackets of successive halving that trade many short runs against few long ones;
+    # results of all brackets merged, best first. A configuration drawn in several brackets
+    # (every bracket of a grid space gets the whole grid) is reported once, by its longest run.
+    s_max = int(np.log(max_iterations) / np.log(eta) + 1e-9)
+    results = []
+    for s in range(s_max, -1, -1):
+        n = int(np.ceil((s_max + 1) / (s + 1) * eta**s))
+        min_iterations = max(1, int(max_iterations * eta**-s))
+        configs = sample_configs(space, n, seed=seed + s)
+        results.extend(successive_halving(func, optimizer, configs, start_points, min_iterations, max_iterations, eta, seed))
+
+    merged = {}
+    for r in sorted(results, key=lambda r: (-r['iterations'], r['score'])):
+        merged.setdefault(tuple(sorted(r['params'].items())), r)
+    return list(merged.values())
+
+def _parse_space(items):
+    # lr=0.01,0.05,0.1 (grid), lr=uniform:0:1 or lr=loguniform:1e-4:1
+    space = {}
+    for item in items:
+        name, value = item.split('=', 1)
+        if ':' in value:
+            kind, low, high = value.split(':')
+            space[name] = (kind, float(low), float(high))
+        else:
+            space[name] = [float(v) for v in value.split(',')]
+    return space
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tune optimizer hyperparameters with successive halving')
+    parser.add_argument('--function', default='Ackley', choices=list(FUNCTIONS))
+    parser.add_argument('--optimizer', default='SGD', choices=list(STEPS))
+    parser.add_argument('--dim', type=int, default=2)
+    parser.add_argument('--space', nargs='+', help='name=v1,v2,... or name=uniform:low:high or name=loguniform:low:high')
+    parser.add_argument('--samples', type=int, help='number of sampled configurations (default: the full grid)')
+    parser.add_argument('--starts', type=int, default=4, help='start points per configuration')
+    parser.add_argument('--start-scheme', default='uniform', choices=SCHEMES, help='how start points are generated (see starts.py)')
+    parser.add_argument('--candidates', type=int, help='generate this many start candidates and keep the best --starts')
+    parser.add_argument('--min-iterations', type=int, default=10)
+    parser.add_argument('--max-iterations', type=int, default=270)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--hyperband', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dtype', default='float64', choices=['float64', 'float32'], help='evaluation precision')
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    space = _parse_space(args.space) if args.space else DEFAULT_SPACES.get(args.optimizer)
+    if not space:
+        parser.error(f'{args.optimizer} has no default space, pass --space')
+    func = make_function(args.function, args.dim, seed=FUNCTION_SEED, dtype=args.dtype)
+    start_points = make_starts(func, args.dim, args.starts, args.start_scheme, args.candidates, args.seed)
+
+    if args.hyperband:
+        results = hyperband(func, args.optimizer, space, start_points, args.max_iterations, args.eta, args.seed)
+    else:
+        samples = args.samples
+        if samples is None and not all(isinstance(d, list) for d in space.values()):
+            samples = 27
+        configs = sample_configs(space, samples, args.seed)
+        results = successive_halving(func, args.optimizer, configs, start_points,
+                                     args.min_iterations, args.max_iterations, args.eta, args.seed)
+
+    spent = sum(r['iterations'] for r in results)
+    print(f'{len(results)} configurations, {spent} of {len(results) * args.max_iterations} iterations '
+          f'({spent / (len(results) * args.max_iterations):.0%} of running all to completion)')
+    for r in results[:args.top]:
+        params = ', '.join(f'{k}={v:.4g}' for k, v in r['params'].items())
+        print(f"  {params:30s} score={r['score']:.6g} iterations={r['iterations']} evaluations={r['evaluations']}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
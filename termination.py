@@ -0,0 +1,110 @@
+import time
+import numpy as np
+
+# Every reason a run can stop with; 'iterations' means the budget ran out and
+# 'cancelled' is set by the app's background jobs (jobs.py)
+REASONS = ('global_min', 'ftol', 'xtol', 'gtol', 'sigma', 'stagnation', 'max_evaluations', 'max_time', 'iterations', 'cancelled')
+
+def known_minimum(func, dim):
+    # The minimiser a run can be checked against: x_best when the function knows it,
+    # else the 2-D global_min table entry; None when neither applies to dim
+    x_best = getattr(func, 'x_best', None)
+    if x_best is None:
+        x_best = getattr(func, 'global_min', None)
+    if x_best is None or np.shape(x_best) != (dim,):
+        return None
+    return np.asarray(x_best, dtype=float)
+
+class Termination:
+
+    # Stopping rules shared by every optimizer, checked after each step. None disables a rule.
+    #   global_min       x matches the known minimiser to 2 decimals
+    #   ftol             |f - previous f| <= ftol * max(1, |f|)
+    #   xtol             ||x - previous x|| <= xtol
+    #   gtol             gradient norm <= gtol (steps that report one: SGD, Adam)
+    #   sigma            CMA step size <= sigma
+    #   patience         best f improved by less than min_delta over the last patience steps
+    #   max_evaluations  objective evaluations spent
+    #   max_time         wall-clock seconds since the run started
+    # check() returns the first rule that fires; reason keeps it after the run.
+    # ftol, xtol, sigma and patience detect one search converging. Restart strategies
+    # (steps with restarts set, IPOP/BIPOP) restart on that themselves, so those rules are
+    # skipped for them and only the budget rules and global_min end the whole run.
+
+    def __init__(self, global_min=True, ftol=None, xtol=None, gtol=None, sigma=None,
+                 patience=None, min_delta=0.0, max_evaluations=None, max_time=None):
+
+        self.global_min = global_min
+        self.ftol = ftol
+        self.xtol = xtol
+        self.gtol = gtol
+        self.sigma = sigma
+        self.patience = patience
+        self.min_delta = min_delta
+        self.max_evaluations = max_evaluations
+        self.max_time = max_time
+        self.start(None, None)
+
+    def start(self, func, start_point):
+
+        # Resets the state for a new run from start_point
+        self.reason = 'iterations'
+        self._target = None
+        if self.global_min and func is not None:
+            self._target = known_minimum(func, len(start_point))
+        self._prev_x = None if start_point is None else np.array(start_point, dtype=float)
+        self._prev_f = None
+        self._best = np.inf
+        self._since_best = 0
+        self._started = time.perf_counter()
+
+    def __setstate__(self, state):
+
+        # The wall clock of a restored run (max_time) counts from the moment it resumes
+        self.__dict__.update(state)
+        self._started = time.perf_counter()
+
+    def check(self, step):
+
+        reason = self._check(step)
+        self._prev_x = np.array(step.x, dtype=float)
+        self._prev_f = step.f
+        if reason is not None:
+            self.reason = reason
+        return reason
+
+    def _check(self, step):
+
+        x = np.asarray(step.x, dtype=float)
+        if self._target is not None and np.allclose(np.round(x, 2), np.round(self._target, 2)):
+            return 'global_min'
+        if self.gtol is not None and step.grad_norm is not None and step.grad_norm <= self.gtol:
+            return 'gtol'
+        if not step.restarts:
+            reason = self._check_convergence(step, x)
+            if reason is not None:
+                return reason
+        if self.max_evaluations is not None and step.evaluations >= self.max_evaluations:
+            return 'max_evaluations'
+        if self.max_time is not None and time.perf_counter() - self._started >= self.max_time:
+            return 'max_time'
+        return None
+
+    def _check_convergence(self, step, x):
+
+        if self.sigma is not None and step.sigma is not None and step.sigma <= self.sigma:
+            return 'sigma'
+        if self.ftol is not None and self._prev_f is not None \
+                and abs(step.f - self._prev_f) <= self.ftol * max(1.0, abs(step.f)):
+            return 'ftol'
+        if self.xtol is not None and self._prev_x is not None and np.linalg.norm(x - self._prev_x) <= self.xtol:
+            return 'xtol'
+        if self.patience is not None:
+            if step.f < self._best - self.min_delta:
+                self._best = step.f
+                self._since_best = 0
+            else:
+                self._since_best += 1
+                if self._since_best >= self.patience:
+                    return 'stagnation'
+        return None
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import optimizers
+from math_funcs import make_function
+
+# Every lane of the batched SGD/Adam follows the single-start run from its start point;
+# lanes that stop early repeat their last point
+
+STARTS = np.array([[0.02, -0.01], [1.5, -2.0], [-2.5, 2.2], [0.3, 0.1]])
+
+@pytest.mark.parametrize('name', ['Ackley', 'Rastrigin', 'Rosenbrock'])
+@pytest.mark.parametrize('optimizer', ['sgd', 'adam'])
+def test_lanes_match_single_start_runs(optimizer, name):
+    func = make_function(name, 2)
+    lr = 0.001 if name == 'Rosenbrock' else 0.01
+    paths, reach_min, opt_steps, x = getattr(optimizers, f'{optimizer}_optimization_batch')(func, STARTS, lr=lr, iterations=80)
+
+    for lane, start in enumerate(STARTS):
+        path, lane_reach_min, lane_steps, end = getattr(optimizers, f'{optimizer}_optimization')(func, start, lr=lr, iterations=80)
+        np.testing.assert_array_equal(paths[:len(path), lane], path)
+        np.testing.assert_array_equal(paths[len(path):, lane], np.broadcast_to(end, paths[len(path):, lane].shape))
+        assert reach_min[lane] == lane_reach_min
+        assert opt_steps[lane] == lane_steps
+        np.testing.assert_array_equal(x[lane], end)
+
+@pytest.mark.parametrize('every', [1, 3, 7, None])
+def test_every_keeps_start_every_kth_and_last_step(every):
+    func = make_function('Rastrigin', 2)
+    full = optimizers.sgd_optimization_batch(func, STARTS[1:], lr=0.01, iterations=20)[0]
+    kept = optimizers.sgd_optimization_batch(func, STARTS[1:], lr=0.01, iterations=20, every=every)[0]
+
+    last = len(full) - 1
+    rows = [last] if every is None else sorted(set(range(0, last + 1, every)) | {last})
+    np.testing.assert_array_equal(kept, full[rows])
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+import optimizers
+from checkpoint import Checkpoint
+from math_funcs import Rastrigin
+from termination import Termination
+from trajectory import Trajectory
+
+# A run that crashes after a checkpoint and is resumed from it ends exactly like the
+# uninterrupted run: same path, same step count, same final point. BFGS and L-BFGS-B rebuild
+# their curvature memory on resume, so they only keep the path up to the checkpoint.
+
+class Crash(Exception):
+    pass
+
+class Flaky:
+
+    # The wrapped function, raising Crash on the n-th call of any of its evaluation methods
+
+    def __init__(self, func, n):
+
+        self.func = func
+        self.n = n
+        self.calls = 0
+
+    def _tick(self):
+
+        self.calls += 1
+        if self.calls == self.n:
+            raise Crash
+
+    def __call__(self, x):
+
+        self._tick()
+        return self.func(x)
+
+    def __getattr__(self, name):
+
+        attr = getattr(self.func, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._tick()
+            return attr(*args, **kwargs)
+        return call
+
+CASES = [
+    ('sgd', dict(lr=0.001, iterations=300), 200),
+    ('adam', dict(lr=0.05, iterations=300), 200),
+    ('cmaes', dict(iterations=300, seed=3), 200),
+    ('lra_cma', dict(iterations=300, seed=3), 200),
+    ('bipop_cma', dict(iterations=400, seed=3, sigma=2.0), 250),
+]
+
+@pytest.mark.parametrize('name, params, crash_at', CASES, ids=[case[0] for case in CASES])
+def test_resume_matches_uninterrupted_run(tmp_path, name, params, crash_at):
+    optimize = getattr(optimizers, f'{name}_optimization')
+    func = Rastrigin(4)
+    x0 = np.full(4, 3.3)
+    path = str(tmp_path / 'run.ckpt')
+
+    reference = optimize(func, x0, termination=Termination(global_min=False), **params)
+    with pytest.raises(Crash):
+        optimize(Flaky(func, crash_at), x0, termination=Termination(global_min=False),
+                 checkpoint=Checkpoint(path, every=25), **params)
+
+    checkpoint = Checkpoint(path, every=25)
+    assert checkpoint.resuming and checkpoint.steps > 0
+    resumed = optimize(func, x0, checkpoint=checkpoint, **params)
+
+    np.testing.assert_array_equal(resumed[0], reference[0])
+    assert resumed[2] == reference[2]
+    np.testing.assert_array_equal(resumed[3], reference[3])
+    assert not (tmp_path / 'run.ckpt').exists()
+
+@pytest.mark.parametrize('name', ['bfgs', 'lbfgsb'])
+def test_scipy_resume_continues_from_the_checkpoint(tmp_path, name):
+    optimize = getattr(optimizers, f'{name}_optimization')
+    func = Rastrigin(4)
+    x0 = np.full(4, 3.3)
+    path = str(tmp_path / 'run.ckpt')
+
+    reference = optimize(func, x0, termination=Termination(global_min=False), iterations=60)
+    with pytest.raises(Crash):
+        optimize(Flaky(func, 5), x0, termination=Termination(global_min=False), checkpoint=Checkpoint(path, every=3),
+                 iterations=60)
+
+    checkpoint = Checkpoint(path, every=3)
+    saved = checkpoint.steps
+    assert saved > 0
+    resumed = optimize(func, x0, checkpoint=checkpoint, iterations=60)
+
+    np.testing.assert_array_equal(resumed[0][:saved + 1], reference[0][:saved + 1])
+    assert func(resumed[3]) <= func(reference[0][saved])
+
+def test_resume_with_spilled_trajectory(tmp_path):
+    func = Rastrigin(4)
+    x0 = np.full(4, 3.3)
+    path = str(tmp_path / 'run.ckpt')
+    params = dict(lr=0.001, iterations=300)
+
+    def recorder():
+        return Trajectory(4, capacity=8, spill_to=str(tmp_path / 'path.npy'), spill_bytes=256)
+
+    reference = optimizers.sgd_optimization(func, x0, termination=Termination(global_min=False), **params)
+    with pytest.raises(Crash):
+        optimizers.sgd_optimization(Flaky(func, 200), x0, recorder=recorder(), termination=Termination(global_min=False),
+                                    checkpoint=Checkpoint(path, every=25), **params)
+    resumed = optimizers.sgd_optimization(func, x0, recorder=recorder(), checkpoint=Checkpoint(path, every=25), **params)
+
+    np.testing.assert_array_equal(resumed[0], reference[0])
+    assert resumed[2] == reference[2]
+
+def test_duplicate_grid_tasks_use_separate_checkpoints(tmp_path, monkeypatch):
+    import functools
+    import runner
+
+    task = runner.make_grid(['Rastrigin'], ['SGD'], [[3.3, 3.3]], [0], params={'SGD': {'lr': 0.001, 'iterations': 300}},
+                            termination={'global_min': False})[0]
+    paths = {runner.task_checkpoint(task, index, directory=str(tmp_path)).path for index in range(3)}
+    assert len(paths) == 3
+    assert runner.task_checkpoint(task, 1, directory=str(tmp_path)).path in paths
+
+    monkeypatch.setattr(runner, 'task_checkpoint', functools.partial(runner.task_checkpoint, directory=str(tmp_path)))
+    results = sorted(runner.run_grid([task] * 3, executor='thread', max_workers=3), key=lambda result: result['index'])
+    assert [result['index'] for result in results] == [0, 1, 2]
+    for result in results[1:]:
+        np.testing.assert_array_equal(result['path'], results[0]['path'])
+    assert list(tmp_path.iterdir()) == []
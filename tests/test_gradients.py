@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from math_funcs import FUNCTIONS, make_function
+from utils.utils_funcs import bounds_box
+
+# Analytic gradients of every objective against central finite differences of its values
+
+def finite_difference(func, x, h=1e-6):
+    steps = h * np.maximum(np.abs(x), 1.0)
+    E = np.diag(steps)
+    return (func.evaluate_batch(x + E) - func.evaluate_batch(x - E)) / (2 * steps)
+
+@pytest.mark.parametrize('dim', [2, 5])
+@pytest.mark.parametrize('name', list(FUNCTIONS))
+def test_gradient_matches_finite_difference(name, dim):
+    func = make_function(name, dim, seed=0)
+    low, high = bounds_box(func.bounds, dim)
+    # Away from the edges, where Ackley's kink at the origin is not hit either
+    X = np.random.default_rng(dim).uniform(low + 0.1, high - 0.1, (4, dim))
+
+    values, grads = func.value_and_grad_batch(X)
+    np.testing.assert_allclose(values, func.evaluate_batch(X))
+    for x, grad in zip(X, grads):
+        np.testing.assert_allclose(grad, finite_difference(func, x), rtol=1e-4, atol=1e-6 * max(np.abs(grad).max(), 1.0))
+
+@pytest.mark.parametrize('name', list(FUNCTIONS))
+def test_single_point_gradient_is_the_batch_row(name):
+    func = make_function(name, 3, seed=0)
+    x = np.linspace(0.2, 0.9, 3)
+    value, grad = func.value_and_grad(x)
+    assert value == func(x)
+    np.testing.assert_array_equal(grad, func.value_and_grad_batch(x[None])[1][0])
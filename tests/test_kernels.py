@@ -0,0 +1,78 @@
+import math
+import numpy as np
+import pytest
+from math_funcs import FUNCTIONS, make_function
+from utils.utils_funcs import bounds_box
+
+# The vectorized kernels against the original per-point formulas
+
+def ackley(x):
+    s1 = sum(v * v for v in x) / len(x)
+    s2 = sum(math.cos(2 * math.pi * v) for v in x) / len(x)
+    return 20 + math.e - 20 * math.exp(-0.2 * s1) - math.exp(s2)
+
+def rastrigin(x):
+    return 10 * len(x) + sum(v * v - math.cos(2 * math.pi * v) * 10 for v in x)
+
+def rosenbrock(x):
+    return sum(100 * (x[i + 1] - x[i]**2)**2 + (x[i] - 1)**2 for i in range(len(x) - 1))
+
+def fletcher_matrices(dim, seed):
+    # The draws Fletcher made with np.random.seed(seed): x_best, then a and b
+    rng = np.random.RandomState(seed)
+    x_best = rng.uniform(-np.pi, np.pi, dim)
+    return x_best, rng.uniform(-100, 100, (dim, dim)), rng.uniform(-100, 100, (dim, dim))
+
+def fletcher(x, seed):
+    x_best, a, b = fletcher_matrices(len(x), seed)
+    A = np.sum(a * np.sin(x_best) + b * np.cos(x_best), axis=0)
+    B = np.sum(a * np.sin(x) + b * np.cos(x), axis=0)
+    return sum((p - q)**2 for p, q in zip(A, B))
+
+def fletcher_powell(x, seed):
+    x_best, a, b = fletcher_matrices(len(x), seed)
+    A = [sum(a[i, j] * math.sin(x_best[j]) + b[i, j] * math.cos(x_best[j]) for j in range(len(x))) for i in range(len(x))]
+    B = [sum(a[i, j] * math.sin(x[j]) + b[i, j] * math.cos(x[j]) for j in range(len(x))) for i in range(len(x))]
+    return sum((p - q)**2 for p, q in zip(A, B))
+
+def michalewicz(x, m=10):
+    return -sum(math.sin(v) * math.sin((i + 1) * v**2 / math.pi)**(2 * m) for i, v in enumerate(x))
+
+REFERENCES = {
+    'Ackley': lambda x, seed: ackley(x),
+    'Rastrigin': lambda x, seed: rastrigin(x),
+    'Rosenbrock': lambda x, seed: rosenbrock(x),
+    'Fletcher': fletcher,
+    'FletcherPowell': fletcher_powell,
+    'Michalewicz': lambda x, seed: michalewicz(x)
+}
+
+def points(func, dim, n=6):
+    low, high = bounds_box(func.bounds, dim)
+    return np.random.default_rng(dim).uniform(low, high, (n, dim))
+
+def test_every_function_has_a_reference():
+    assert set(REFERENCES) == set(FUNCTIONS)
+
+@pytest.mark.parametrize('dim', [2, 3, 8])
+@pytest.mark.parametrize('name', list(FUNCTIONS))
+def test_batch_matches_the_per_point_formula(name, dim):
+    func = make_function(name, dim, seed=3)
+    X = points(func, dim)
+    expected = [REFERENCES[name](x, 3) for x in X]
+    np.testing.assert_allclose(func.evaluate_batch(X), expected, rtol=1e-12, atol=1e-12)
+
+@pytest.mark.parametrize('name', list(FUNCTIONS))
+def test_call_is_row_zero_of_the_batch(name):
+    func = make_function(name, 4, seed=3)
+    X = points(func, 4)
+    values = func.evaluate_batch(X)
+    for x, value in zip(X, values):
+        assert func(x) == func.evaluate_batch(x)[0]
+        # FletcherPowell's matrix products may round differently per batch size (BLAS)
+        if name == 'FletcherPowell':
+            np.testing.assert_allclose(func(x), value, rtol=1e-14)
+        else:
+            assert func(x) == value
+    # A single point passed to evaluate_batch is a batch of one
+    assert func.evaluate_batch(X[0]).shape == (1,)
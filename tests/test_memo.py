@@ -0,0 +1,88 @@
+import numpy as np
+import optimizers
+from instrument import Counted
+from math_funcs import Ackley, Rastrigin
+from memo import Memoized, memoize
+
+# The evaluation cache returns exactly what the function would, evaluates each distinct point
+# once and stays within maxsize
+
+def test_disabled_returns_the_function():
+    func = Ackley(2)
+    assert memoize(func, enabled=False) is func
+    assert isinstance(memoize(func, enabled=True), Memoized)
+
+def test_batch_deduplicates_within_and_across_calls():
+    counted = Counted(Rastrigin(2))
+    memo = Memoized(counted)
+    X = np.array([[0.1, 0.2], [0.3, 0.4], [0.1, 0.2], [0.1, 0.2], [0.5, 0.6]])
+
+    np.testing.assert_array_equal(memo.evaluate_batch(X), counted.func.evaluate_batch(X))
+    assert counted.points == 3
+    assert memo.stats()['misses'] == 3 and memo.stats()['hits'] == 2
+
+    memo.evaluate_batch(X[::-1])
+    assert counted.points == 3
+    assert memo(X[1]) == counted.func(X[1])
+    assert counted.points == 3 and counted.calls == 1
+
+def test_value_and_grad_batch_deduplicates_and_fills_values():
+    counted = Counted(Rastrigin(3))
+    memo = Memoized(counted)
+    X = np.array([[0.1, 0.2, 0.3], [0.1, 0.2, 0.3], [1.0, -1.0, 0.5]])
+
+    values, grads = memo.value_and_grad_batch(X)
+    expected_values, expected_grads = counted.func.value_and_grad_batch(X)
+    np.testing.assert_array_equal(values, expected_values)
+    np.testing.assert_array_equal(grads, expected_grads)
+    assert counted.points == 2
+
+    # Values of points seen with their gradient are served from the cache too
+    memo.evaluate_batch(X)
+    assert counted.points == 2
+
+def test_quantization_shares_nearby_points():
+    counted = Counted(Ackley(2))
+    memo = Memoized(counted, decimals=3)
+    first = memo(np.array([0.5, 0.5]))
+
+    assert memo(np.array([0.5001, 0.4999])) == first
+    assert counted.calls == 1
+    # -0.0 and 0.0 round to the same key
+    memo(np.array([0.0, 0.0]))
+    memo(np.array([-0.0, 0.0]))
+    assert counted.calls == 2
+    # Exact keys without decimals
+    exact = Memoized(Counted(Ackley(2)))
+    exact(np.array([0.5, 0.5]))
+    exact(np.array([0.5001, 0.4999]))
+    assert exact.func.calls == 2
+
+def test_lru_bound():
+    counted = Counted(Ackley(2))
+    memo = Memoized(counted, maxsize=3)
+    points = [np.array([i, i], dtype=float) for i in range(5)]
+    for x in points:
+        memo(x)
+    assert memo.stats()['size'] == 3
+
+    # The most recent points are kept, the oldest were evicted
+    memo(points[4])
+    assert counted.calls == 5
+    memo(points[0])
+    assert counted.calls == 6
+
+def test_size_counts_distinct_points():
+    memo = Memoized(Rastrigin(2))
+    X = np.random.default_rng(0).uniform(-3, 3, (4, 2))
+    for x in X:
+        memo.value_and_grad(x)
+    memo.evaluate_batch(np.vstack([X, [[0.5, 0.5]]]))
+    stats = memo.stats()
+
+    assert (stats['size'], stats['values'], stats['pairs']) == (5, 5, 4)
+
+    # A BFGS run reports each point it evaluated once
+    memo = Memoized(Counted(Rastrigin(2)))
+    optimizers.bfgs_optimization(memo, np.array([2.3, -1.7]), iterations=50)
+    assert memo.stats()['size'] == memo.func.points
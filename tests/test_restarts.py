@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import optimizers
+from math_funcs import Rastrigin
+from termination import Termination
+
+# IPOP/BIPOP end at the best point sampled over all their instances, not at the mean of the
+# instance running when the budget ran out
+
+class Lowest:
+
+    # The wrapped function, remembering the lowest value it returned
+
+    def __init__(self, func):
+
+        self.func = func
+        self.lowest = np.inf
+        self.bounds, self.x_best, self.global_min = func.bounds, func.x_best, func.global_min
+
+    def __call__(self, x):
+
+        return self.evaluate_batch(np.atleast_2d(x))[0]
+
+    def evaluate_batch(self, X):
+
+        values = self.func.evaluate_batch(X)
+        self.lowest = min(self.lowest, values.min())
+        return values
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('strategy', ['ipop', 'bipop'])
+def test_end_point_is_the_best_point_seen(strategy, seed):
+    func = Rastrigin(5)
+    counted = Lowest(func)
+    optimize = getattr(optimizers, f'{strategy}_cma_optimization')
+    _, _, _, end = optimize(counted, np.full(5, 3.0), iterations=300, max_evaluations=3000, seed=seed)
+
+    assert func(end) == counted.lowest
+
+@pytest.mark.parametrize('strategy', ['ipop', 'bipop'])
+def test_convergence_rules_do_not_end_the_restarts(strategy):
+    termination = Termination(global_min=False, sigma=0.5, ftol=1e-3, xtol=1e-3, patience=3)
+    optimize = getattr(optimizers, f'{strategy}_cma_optimization')
+    _, _, steps, _ = optimize(Rastrigin(5), np.full(5, 3.0), iterations=300, max_evaluations=3000, seed=0,
+                              termination=termination)
+
+    assert termination.reason == 'iterations'
+    assert steps > 100
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+import surface
+from instrument import Counted
+from math_funcs import make_function
+from surface import evaluate_grid
+
+# Background grids: caching, read-only results, and adaptive grids against uniform ones
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    surface.clear_grid_cache()
+    yield
+    surface.clear_grid_cache()
+
+def test_uniform_grid_values():
+    func = make_function('Ackley', 2)
+    x, y, data = evaluate_grid(func, points_by_dim=9)
+    assert data.shape == (9, 9)
+    assert data[2, 7] == func(np.array([x[2], y[7]]))
+
+def test_cache_key():
+    func = make_function('Fletcher', 2, seed=0)
+    first = evaluate_grid(func, points_by_dim=20)[2]
+    # Equal parameters share the entry, wrappers included
+    assert evaluate_grid(make_function('Fletcher', 2, seed=0), points_by_dim=20)[2] is first
+    assert evaluate_grid(Counted(func), points_by_dim=20)[2] is first
+    # Anything else that changes the values does not
+    assert evaluate_grid(make_function('Fletcher', 2, seed=1), points_by_dim=20)[2] is not first
+    assert evaluate_grid(func, points_by_dim=21)[2] is not first
+    assert evaluate_grid(func, bounds=(-1, 1, -1, 1), points_by_dim=20)[2] is not first
+    assert evaluate_grid(func, points_by_dim=20, adaptive=True)[2] is not first
+    assert evaluate_grid(func, points_by_dim=20, use_cache=False)[2] is not first
+
+def test_cached_arrays_are_read_only():
+    for array in evaluate_grid(make_function('Ackley', 2), points_by_dim=10):
+        assert not array.flags.writeable
+        with pytest.raises(ValueError):
+            array[0] = 1.0
+
+def counted_grids(name, points):
+    func = make_function(name, 2, seed=0)
+    counted = Counted(func)
+    _, _, uniform = evaluate_grid(func, points_by_dim=points, use_cache=False)
+    _, _, adaptive = evaluate_grid(counted, points_by_dim=points, adaptive=True, use_cache=False)
+    return uniform, adaptive, counted.points
+
+@pytest.mark.parametrize('name', ['Rosenbrock', 'Michalewicz'])
+def test_adaptive_grid_saves_evaluations_on_smooth_functions(name):
+    uniform, adaptive, evaluations = counted_grids(name, 70)
+    assert evaluations < 0.6 * 70 * 70
+    assert np.max(np.abs(adaptive - uniform)) < 0.02 * np.ptp(uniform)
+
+@pytest.mark.parametrize('points', [30, 70, 100])
+def test_adaptive_grid_falls_back_to_all_points_on_rugged_functions(points):
+    uniform, adaptive, evaluations = counted_grids('Rastrigin', points)
+    assert evaluations == points * points
+    np.testing.assert_array_equal(adaptive, uniform)
+
+@pytest.mark.parametrize('name', ['Ackley', 'Rastrigin', 'Rosenbrock', 'Fletcher', 'Michalewicz'])
+@pytest.mark.parametrize('points', [30, 70, 100, 200])
+def test_adaptive_grid_never_costs_more_than_uniform(name, points):
+    uniform, adaptive, evaluations = counted_grids(name, points)
+    assert evaluations <= points * points
+    assert evaluations <= surface.ADAPTIVE_MAX_FRACTION * points * points or np.array_equal(adaptive, uniform)
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import optimizers
+from optimizers import Step
+from math_funcs import Fletcher, Michalewicz, Rosenbrock, make_function
+from termination import Termination
+
+# Each stopping rule fires on its own condition and is recorded in termination.reason
+
+def run(termination, steps, func=None, start_point=(0.0, 0.0)):
+    # Checks the steps in order and returns the first reason, None when none fired
+    termination.start(func, np.array(start_point))
+    for step in steps:
+        reason = termination.check(step)
+        if reason is not None:
+            return reason
+    return None
+
+def step(x=(1.0, 1.0), f=1.0, evaluations=1, **fields):
+    return Step(np.array(x, dtype=float), f, evaluations, 0.0, **fields)
+
+def test_no_rule_keeps_iterations():
+    termination = Termination(global_min=False)
+    assert run(termination, [step(f=f) for f in (3.0, 2.0, 1.0)]) is None
+    assert termination.reason == 'iterations'
+
+def test_ftol():
+    termination = Termination(global_min=False, ftol=1e-6)
+    assert run(termination, [step(f=10.0), step(x=(2, 2), f=5.0), step(x=(3, 3), f=5.0 + 1e-6)]) == 'ftol'
+    assert termination.reason == 'ftol'
+    # Relative to |f| when it is above 1
+    assert run(Termination(global_min=False, ftol=1e-6), [step(f=1e6), step(x=(2, 2), f=1e6 + 0.5)]) == 'ftol'
+    assert run(Termination(global_min=False, ftol=1e-6), [step(f=1.0), step(x=(2, 2), f=1.1)]) is None
+
+def test_xtol():
+    termination = Termination(global_min=False, xtol=1e-3)
+    assert run(termination, [step(x=(1, 1), f=3.0), step(x=(1.1, 1), f=2.0), step(x=(1.1, 1.0005), f=1.0)]) == 'xtol'
+    # The first step is compared with the start point
+    assert run(Termination(global_min=False, xtol=1e-3), [step(x=(0, 0.0001))]) == 'xtol'
+
+def test_gtol():
+    termination = Termination(global_min=False, gtol=1e-4)
+    assert run(termination, [step(grad_norm=1.0), step(x=(2, 2), grad_norm=1e-5)]) == 'gtol'
+    # Steps without a gradient norm never fire it
+    assert run(Termination(global_min=False, gtol=1e-4), [step(), step(x=(2, 2))]) is None
+
+def test_sigma():
+    termination = Termination(global_min=False, sigma=1e-3)
+    assert run(termination, [step(sigma=0.5), step(x=(2, 2), sigma=1e-4)]) == 'sigma'
+
+def test_patience_and_min_delta():
+    termination = Termination(global_min=False, patience=3)
+    values = [5.0, 4.0, 4.5, 4.2, 4.1]
+    steps = [step(x=(i, i), f=f) for i, f in enumerate(values)]
+    assert run(termination, steps[:4]) is None
+    assert run(termination, steps) == 'stagnation'
+
+    # Improvements smaller than min_delta count as none
+    termination = Termination(global_min=False, patience=2, min_delta=0.5)
+    assert run(termination, [step(x=(i, i), f=f) for i, f in enumerate([5.0, 4.9, 4.8])]) == 'stagnation'
+
+def test_max_evaluations():
+    termination = Termination(global_min=False, max_evaluations=100)
+    assert run(termination, [step(x=(1, 1), evaluations=60), step(x=(2, 2), evaluations=100)]) == 'max_evaluations'
+
+def test_max_time():
+    termination = Termination(global_min=False, max_time=0.0)
+    assert run(termination, [step()]) == 'max_time'
+    assert run(Termination(global_min=False, max_time=60.0), [step()]) is None
+
+def test_restart_steps_skip_convergence_rules():
+    termination = Termination(global_min=False, ftol=1.0, xtol=10.0, sigma=1.0, patience=1, max_evaluations=10)
+    steps = [step(x=(1, 1), sigma=1e-3, restarts=True, evaluations=5), step(x=(1, 1), sigma=1e-3, restarts=True, evaluations=10)]
+    assert run(termination, steps) == 'max_evaluations'
+
+def test_global_min_uses_x_best_before_the_table():
+    # Fletcher's minimiser is random: its x_best counts, the (0, 0) table entry does not
+    func = Fletcher(2, seed=0)
+    assert run(Termination(), [step(x=func.x_best)], func) == 'global_min'
+    assert run(Termination(), [step(x=(0.0, 0.0))], func) is None
+
+def test_global_min_compares_signed_coordinates():
+    func = Rosenbrock(2)
+    assert run(Termination(), [step(x=(1.001, 0.999))], func) == 'global_min'
+    assert run(Termination(), [step(x=(-1.0, -1.0))], func) is None
+    assert run(Termination(), [step(x=(-1.0, 1.0))], func) is None
+
+def test_global_min_falls_back_to_the_table_in_2d():
+    func = Michalewicz()
+    assert run(Termination(), [step(x=(2.2, 1.57))], func) == 'global_min'
+    # No known minimiser above 2 dims: the rule cannot fire
+    assert run(Termination(), [step(x=(2.2, 1.57, 1.0))], func, start_point=(0.0, 0.0, 0.0)) is None
+
+@pytest.mark.parametrize('optimizer', ['sgd', 'adam', 'bfgs', 'lbfgsb'])
+def test_fletcher_reach_min_is_its_random_minimiser(optimizer):
+    func = make_function('Fletcher', 2, seed=0)
+    params = {'sgd': {'lr': 3e-5}, 'adam': {'lr': 0.01}}.get(optimizer, {})
+    _, reach_min, _, end = getattr(optimizers, f'{optimizer}_optimization')(func, func.x_best + 0.05, iterations=200, **params)
+
+    assert reach_min
+    np.testing.assert_allclose(np.round(end, 2), np.round(func.x_best, 2))
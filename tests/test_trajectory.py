@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pytest
+from trajectory import Trajectory
+
+# Recording policies, growth and spilling of the trajectory store
+
+def record(trajectory, values, dim=2):
+    # Step i records the point (i, i, ...) with objective values[i]
+    for i, f in enumerate(values):
+        trajectory.record(np.full(dim, float(i)), f)
+    return trajectory.close()
+
+def test_all_keeps_every_point_and_grows():
+    trajectory = record(Trajectory(2, capacity=1), np.arange(10.0))
+    np.testing.assert_array_equal(trajectory.steps, np.arange(10))
+    np.testing.assert_array_equal(trajectory.array(), np.repeat(np.arange(10.0), 2).reshape(10, 2))
+    assert len(trajectory) == 10
+
+def test_every_keeps_each_kth_step_and_the_last():
+    trajectory = record(Trajectory(2, policy='every', every=3), np.zeros(11))
+    np.testing.assert_array_equal(trajectory.steps, [0, 3, 6, 9, 10])
+    np.testing.assert_array_equal(trajectory.array()[:, 0], [0, 3, 6, 9, 10])
+
+def test_every_does_not_repeat_a_last_step_it_kept():
+    trajectory = record(Trajectory(2, policy='every', every=5), np.zeros(11))
+    np.testing.assert_array_equal(trajectory.steps, [0, 5, 10])
+
+def test_best_keeps_improvements_and_the_last():
+    values = [5.0, 6.0, 4.0, 4.0, 3.0, 7.0, 8.0]
+    trajectory = record(Trajectory(2, policy='best'), values)
+    np.testing.assert_array_equal(trajectory.steps, [0, 2, 4, 6])
+
+def test_log_spacing_grows():
+    trajectory = record(Trajectory(2, policy='log', log_ratio=2.0), np.zeros(100))
+    np.testing.assert_array_equal(trajectory.steps, [0, 1, 2, 3, 4, 8, 16, 32, 64, 99])
+
+def test_unknown_policy():
+    with pytest.raises(AssertionError):
+        Trajectory(2, policy='sometimes')
+
+def test_dtype():
+    trajectory = record(Trajectory(2, dtype=np.float32), np.zeros(3))
+    assert trajectory.array().dtype == np.float32
+
+@pytest.mark.parametrize('policy', ['all', 'every'])
+def test_spill_leaves_exactly_the_recorded_rows(tmp_path, policy):
+    filename = str(tmp_path / 'path.npy')
+    X = np.random.default_rng(0).normal(size=(300, 8))
+    reference = Trajectory(8, policy=policy, every=7)
+    spilled = Trajectory(8, capacity=4, policy=policy, every=7, spill_to=filename, spill_bytes=1024)
+    for x in X:
+        reference.record(x)
+        spilled.record(x)
+    reference.close()
+    spilled.close()
+
+    saved = np.load(filename)
+    np.testing.assert_array_equal(saved, reference.array())
+    np.testing.assert_array_equal(spilled.array(), reference.array())
+    np.testing.assert_array_equal(spilled.steps, reference.steps)
+    # Only the final file is left, none of the growth files
+    assert os.listdir(tmp_path) == ['path.npy']
+
+def test_no_spill_below_the_threshold(tmp_path):
+    filename = str(tmp_path / 'path.npy')
+    trajectory = record(Trajectory(2, spill_to=filename, spill_bytes=10**6), np.zeros(20))
+    assert len(trajectory) == 20
+    assert os.listdir(tmp_path) == []
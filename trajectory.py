@@ -0,0 +1,151 @@
+import os
+import numpy as np
+
+POLICIES = ('all', 'every', 'best', 'log')
+
+class Trajectory:
+
+    # Records optimizer points into a preallocated (capacity, dim) array that doubles when full.
+    #   policy='all'    every point
+    #   policy='every'  every k-th step (k = every)
+    #   policy='best'   only points that improve on the best f seen so far
+    #   policy='log'    log-spaced steps, the gap growing by log_ratio each time
+    # The first and the last point are always kept. With spill_to set, storage moves to a
+    # memory-mapped .npy file once it would exceed spill_bytes, and close() leaves exactly
+    # the recorded rows in spill_to.
+
+    def __init__(self, dim, capacity=64, policy='all', every=1, log_ratio=1.5,
+                 spill_to=None, spill_bytes=0, dtype=np.float64):
+
+        assert policy in POLICIES, f"Unknown recording policy {policy!r}, expected one of {POLICIES}"
+
+        self.dim = dim
+        self.policy = policy
+        self.every = max(int(every), 1)
+        self.log_ratio = log_ratio
+        self.spill_to = spill_to
+        self.spill_bytes = spill_bytes
+        self.dtype = np.dtype(dtype)
+
+        self.steps = np.empty(max(capacity, 1), dtype=np.int64)
+        self._data = None
+        self._file = None
+        self._size = 0
+        self._step = -1
+        self._best = np.inf
+        self._next_log = 0
+        self._last = None
+        self._allocate(max(capacity, 1))
+
+    def __len__(self):
+
+        return self._size
+
+    def _allocate(self, capacity):
+
+        spill = self.spill_to is not None and capacity * self.dim * self.dtype.itemsize > self.spill_bytes
+        if spill:
+            # Grown in a side file that then replaces the spill file, so the spill file holds
+            # every recorded row at any time and checkpoints can refer to it instead of copying
+            filename = f"{self.spill_to}.tmp"
+            data = np.lib.format.open_memmap(f"{filename}.grow", mode='w+', dtype=self.dtype, shape=(capacity, self.dim))
+        else:
+            filename = None
+            data = np.empty((capacity, self.dim), dtype=self.dtype)
+
+        if self._data is not None:
+            data[:self._size] = self._data[:self._size]
+            steps = np.empty(capacity, dtype=np.int64)
+            steps[:self._size] = self.steps[:self._size]
+            self.steps = steps
+        if spill:
+            # The replace overwrites the previous spill file, if any
+            self._data = self._file = None
+            os.replace(f"{filename}.grow", filename)
+        else:
+            self._release()
+
+        self._data = data
+        self._file = filename
+
+    def __getstate__(self):
+
+        # In memory, checkpoints carry the recorded rows; spilled, the rows are already on
+        # disk, so they are flushed and only the file name is kept
+        state = dict(vars(self))
+        if self._file is not None:
+            self._data.flush()
+            state['_data'] = None
+        else:
+            state['_data'] = np.array(self._data[:max(self._size, 1)])
+        return state
+
+    def __setstate__(self, state):
+
+        vars(self).update(state)
+        if self._file is not None:
+            # The file may have grown and gained rows after the checkpoint; those past _size
+            # are overwritten as the run resumes
+            self._data = np.load(self._file, mmap_mode='r+')[:len(self.steps)]
+
+    def _release(self):
+
+        filename = self._file
+        self._data = None
+        self._file = None
+        if filename is not None:
+            os.remove(filename)
+
+    def _wanted(self, step, f):
+
+        if step == 0 or self.policy == 'all':
+            return True
+        if self.policy == 'every':
+            return step % self.every == 0
+        if self.policy == 'best':
+            return f is not None and f < self._best
+        if step >= self._next_log:
+            self._next_log = max(self._next_log + 1, int(self._next_log * self.log_ratio))
+            return True
+        return False
+
+    def _append(self, step, x):
+
+        if self._size == len(self._data):
+            self._allocate(2 * len(self._data))
+        self._data[self._size] = x
+        self.steps[self._size] = step
+        self._size += 1
+
+    def record(self, x, f=None):
+
+        self._step += 1
+        self._last = (self._step, np.array(x, dtype=self.dtype))
+        wanted = self._wanted(self._step, f)
+        if f is not None and f < self._best:
+            self._best = f
+        if wanted:
+            self._append(self._step, x)
+        return wanted
+
+    def close(self):
+
+        # Keep the final point even if the policy skipped it
+        if self._last is not None and (self._size == 0 or self.steps[self._size - 1] != self._last[0]):
+            self._append(*self._last)
+
+        if self._file is not None:
+            final = np.lib.format.open_memmap(self.spill_to, mode='w+', dtype=self.dtype, shape=(self._size, self.dim))
+            final[:] = self._data[:self._size]
+            final.flush()
+            self._release()
+            self._data = np.load(self.spill_to, mmap_mode='r')
+        elif len(self._data) > 2 * self._size:
+            self._data = self._data[:self._size].copy()
+
+        self.steps = self.steps[:self._size]
+        return self
+
+    def array(self):
+
+        return self._data[:self._size]
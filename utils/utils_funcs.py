@@ -1,13 +1,47 @@
+import hashlib
 import numpy as np
-from OppOpPopInit import OppositionOperators
 
 def easy_bounds(bound):
     return (-bound, bound, -bound, bound)
 
+def bounds_box(bounds, dim):
+    # Per-coordinate low/high arrays; coordinates past the second reuse the first axis range
+    low = np.full(dim, bounds[0], dtype=float)
+    high = np.full(dim, bounds[1], dtype=float)
+    low[1:2], high[1:2] = bounds[2], bounds[3]
+    return low, high
+
 def check_dim(dim, min = 1):
     assert (type(dim) == int and dim >=min), f"Dimension should be int and not less than {min} for this function (got {dim})"
 
+def as_batch(X, dtype=float):
+    # Single points become a batch of one, so every kernel sees an (n, dim) array
+    X = np.asarray(X, dtype=dtype)
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+def unwrap(func):
+    # The function inside wrappers (instrument.Counted, memo.Memoized), which keep it as .func
+    while 'func' in vars(func):
+        func = func.func
+    return func
+
+def fingerprint(func):
+    # Stable identity of a function object: its class plus every attribute value,
+    # so two instances with equal parameters (and equal random matrices) share a key.
+    # Wrappers hash as the function they wrap.
+    func = unwrap(func)
+    h = hashlib.sha1(type(func).__qualname__.encode())
+    for name, value in sorted(vars(func).items()):
+        h.update(name.encode())
+        if isinstance(value, np.ndarray):
+            h.update(str(value.dtype).encode() + str(value.shape).encode())
+            h.update(np.ascontiguousarray(value).tobytes())
+        else:
+            h.update(repr(value).encode())
+    return h.hexdigest()
+
 def get_good_arrow_place(optimum, bounds):
+    from OppOpPopInit import OppositionOperators
     opt = np.array(optimum)
     minimums = np.array([bounds[0], bounds[2]])
     maximums = np.array([bounds[1], bounds[3]])
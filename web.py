@@ -1,21 +1,63 @@
+import os
+import time
+import uuid
 import streamlit as st
+from streamlit.logger import get_logger
 import numpy as np
 from optimizers import sgd_optimization, adam_optimization, cmaes_optimization, lra_cma_optimization, bfgs_optimization, lbfgsb_optimization
-from math_funcs import Ackley, Rastrigin, Rosenbrock, Fletcher, Michalewicz
-from plot import plot_3d
+from math_funcs import make_function
+from result_cache import ResultCache
+from surface import load_grids
+from instrument import profile_run, timed
+from memo import Memoized, memoize
+from jobs import JobManager, QueueFull
+from settings import APP_FUNCTIONS, DIM, DIMS, FUNCTION_SEED, RUN_SEED, GRID_POINTS, SLICE_POINTS, ASSETS_DIR, MAX_JOB_WORKERS, MAX_QUEUED_JOBS
 from io import BytesIO
 from utils import icon
 
+# plot (matplotlib), chart (altair, pandas) and the projection helpers are imported when first needed
+
+COLORS = {'SGD': 'blue', 'Adam': 'green', 'CMA-ES': 'purple', 'LRA-CMA': 'yellow', 'BFGS': 'orange', 'L-BFGS-B': 'red'}
+
+script_start = time.perf_counter()
+
+@st.cache_resource
+def get_functions(dim):
+    # Memoized when FASTOPT_MEMO=1, shared by every session
+    return {name: memoize(make_function(name, dim, seed=FUNCTION_SEED)) for name in APP_FUNCTIONS}
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+@st.cache_resource
+def get_job_manager():
+    # One worker pool per server so a heavy session cannot starve the others
+    return JobManager(MAX_JOB_WORKERS, MAX_QUEUED_JOBS)
+
+@st.cache_resource
+def load_precomputed_grids():
+    return load_grids(ASSETS_DIR)
+
+@st.cache_resource
+def first_paint_log():
+    # Logged once per process: time from script start to the thumbnails being sent
+    return {'logged': False}
+
 st.set_page_config(page_title="FastOpt",
                    page_icon="🧬",
                    layout="wide")
 icon.show_icon("ִֶָ𓂃 ࣪˖ ִֶָ🐇་༘࿐")
+result_cache = get_result_cache()
+job_manager = get_job_manager()
 
 st.header(":rainbow[Functions...]")
 
 # Initialize session state for optimizer selection
 if 'optimizer_selected' not in st.session_state:
     st.session_state.optimizer_selected = []
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # Sidebar for optimizer selection and input
 with st.sidebar:
@@ -26,8 +68,10 @@ with st.sidebar:
 
     Func = st.selectbox(
         '1️⃣ Select a function to optimize',
-        ['Ackley', 'Rastrigin', 'Rosenbrock', 'Fletcher', 'Michalewicz']
+        APP_FUNCTIONS
     )
+    dim = st.select_slider('Dimension', options=DIMS, value=DIM,
+                           help='Above 2 dimensions the paths are drawn on a 2-D projection.')
     Optimizer = st.multiselect(
         '2️⃣ Select optimizers',
         ['SGD', 'Adam', 'CMA-ES', 'LRA-CMA', 'BFGS', 'L-BFGS-B'],
@@ -64,41 +108,40 @@ with st.sidebar:
         with st.expander("**L-BFGS-B params**", icon="📊"):
             iterations_lbfgsb = st.number_input('Enter number of iterations for L-BFGS-B', value=50)
 
-    start_point = st.text_input('3️⃣ Enter start point (comma-separated)', '3,2')
-    start_point = np.array([float(x) for x in start_point.split(',')])
+    start_point = st.text_input('3️⃣ Enter start point (comma-separated)', '3,2',
+                                help='A shorter list is repeated to fill the dimension.')
+    start_point = np.resize(np.array([float(x) for x in start_point.split(',')]), dim)
     
+    render_mode = st.radio('4️⃣ Rendering', ['Interactive', 'Static image'], horizontal=True,
+                           help='Interactive draws the paths in the browser; click a legend entry to toggle an optimizer.')
+    projection = 'Slice'
+    if dim > 2:
+        projection = st.radio('Projection', ['Slice', 'PCA'], horizontal=True,
+                              help='Slice: the function through the best end point, along the two coordinates the paths '
+                                   'move most. PCA: the plane of the two main directions of all paths.')
+
+    show_profile = st.toggle('Show profiling', value=False,
+                             help='Count objective evaluations and time each optimizer and the plot.')
+
     button_disabled = not bool(Optimizer)
 
     submitted = st.button("Optimize!", use_container_width=True, disabled=button_disabled)
 
+    stats = result_cache.stats()
+    st.caption(f"Result cache: {stats['hits']} hits / {stats['misses']} misses, {stats['size']} entries")
+    jobs_stats = job_manager.stats()
+    st.caption(f"Jobs: {jobs_stats['running']} running / {jobs_stats['queued']} queued on {jobs_stats['max_workers']} workers")
+    memo_func = get_functions(dim)[Func]
+    if isinstance(memo_func, Memoized):
+        memo_stats = memo_func.stats()
+        st.caption(f"Evaluation cache: {memo_stats['hit_rate']:.0%} hits, {memo_stats['size']} points")
+
 # Define functions
-dim = 2
-f1 = Ackley(dim)
-f2 = Rastrigin(dim)
-f3 = Rosenbrock(dim)
-f4 = Fletcher(dim)
-f5 = Michalewicz(dim)
-
-functions = {
-    'Ackley': f1,
-    'Rastrigin': f2,
-    'Rosenbrock': f3,
-    'Fletcher': f4,
-    'Michalewicz': f5
-}
+functions = get_functions(dim)
+load_precomputed_grids()
 
 cols = st.columns(len(functions))
-# for col, (name, func) in zip(cols, functions.items()):
-#     fig = plot_3d(func, points_by_dim=70, title='', bounds=None, 
-#                   show_best_if_exists=False, save_as=None, cmap='viridis', 
-#                   plot_surface=True, plot_heatmap=False)
-    
-#     buf = BytesIO()
-#     fig.savefig(buf, format="png")
-#     col.text(name)
-#     col.caption('Global min: (0,0)')
-#     col.image(buf)
-
+# Thumbnails are rendered at build time by precompute.py
 for col, (name, func) in zip(cols, functions.items()):
     col.text(name)
     if name == 'Ackley':
@@ -109,124 +152,228 @@ for col, (name, func) in zip(cols, functions.items()):
         col.caption('Global min: (1,1)')
     elif name == 'Fletcher':
         col.caption('Global min: (0,0)')
-    else:
+    elif name == 'Michalewicz':
         col.caption('Global min: (2.20, 1.57)')
-    col.image(f'assets/{name}.png')
+    thumbnail = os.path.join(ASSETS_DIR, f'{name}.png')
+    if os.path.exists(thumbnail):
+        col.image(thumbnail)
+
+paint = first_paint_log()
+if not paint['logged']:
+    paint['logged'] = True
+    get_logger('fastopt').info('first paint after %.1f ms', (time.perf_counter() - script_start) * 1000)
 
 st.divider()
 st.header(":rainbow[Optimization Paths...]")
 
+# Runs every optimizer of a submission on a job worker, reusing cached results
+def run_job(job, f, func_name, dim, runs, start_point, show_profile):
+    results = {}
+    for name, (optimizer, params) in runs.items():
+        key = ResultCache.key(func_name, name, params, start_point, seed=FUNCTION_SEED, dim=dim)
+
+        def compute():
+            termination = job.watch(name, params['iterations'])
+            result, job.meta['profiles'][name] = profile_run(optimizer, f, start_point.copy(), enabled=show_profile,
+                                                             label=name, termination=termination, **params)
+            # A cancelled run is incomplete and must not reach the cache
+            job.check_cancelled(termination)
+            return result
+
+        job.meta['profiles'][name] = None
+        results[name] = result_cache.get_or_compute(key, compute)
+        job.report(name, results[name][2], params['iterations'], float(f(results[name][3])))
+    return results
+
 # Activate if submit button is push
 if submitted:
-    f = functions[Func]
-    terminate_points = {}
-    optimization_paths = []
-
+    runs = {}
     if 'SGD' in Optimizer:
-        sgd_path, sgd_reach_min, sgd_opt_steps, sgd_end_point = sgd_optimization(f, lr=lr_rate_sgd, start_point=start_point, iterations=iterations_sgd)
-        terminate_points['SGD'] = [sgd_reach_min, sgd_opt_steps, sgd_end_point]
-        optimization_paths.append((sgd_path, 'SGD', 'blue'))
-        
+        runs['SGD'] = (sgd_optimization, dict(lr=lr_rate_sgd, iterations=iterations_sgd))
     if 'Adam' in Optimizer:
-        adam_path, adam_reach_min, adam_opt_steps, adam_end_point = adam_optimization(f, lr=lr_rate_adam, start_point=start_point, iterations=iterations_adam)
-        terminate_points['Adam'] = [adam_reach_min, adam_opt_steps, adam_end_point]
-        optimization_paths.append((adam_path, 'Adam', 'green'))
-        
+        runs['Adam'] = (adam_optimization, dict(lr=lr_rate_adam, iterations=iterations_adam))
     if 'CMA-ES' in Optimizer:
-        cmaes_path, cmaes_reach_min, cmaes_opt_steps, cmaes_end_point = cmaes_optimization(f, start_point, sigma=sigma_cmaes, iterations=iterations_cmaes)
-        terminate_points['CMA-ES'] = [cmaes_reach_min, cmaes_opt_steps, cmaes_end_point]
-        optimization_paths.append((cmaes_path, 'CMA-ES', 'purple'))
+        runs['CMA-ES'] = (cmaes_optimization, dict(sigma=sigma_cmaes, iterations=iterations_cmaes, seed=RUN_SEED))
     if 'LRA-CMA' in Optimizer:
-        lra_cma_path, lra_cma_reach_min, lra_cma_opt_steps, lra_cma_end_point = lra_cma_optimization(f, start_point, sigma=sigma_lra_cma, iterations=iterations_lra_cma)
-        terminate_points['LRA-CMA'] = [lra_cma_reach_min, lra_cma_opt_steps, lra_cma_end_point]
-        optimization_paths.append((lra_cma_path, 'LRA-CMA', 'yellow'))
+        runs['LRA-CMA'] = (lra_cma_optimization, dict(sigma=sigma_lra_cma, iterations=iterations_lra_cma, seed=RUN_SEED))
     if 'BFGS' in Optimizer:
-        bfgs_path, bfgs_reach_min, bfgs_opt_steps, bfgs_end_point = bfgs_optimization(f, start_point, iterations=iterations_bfgs)
-        terminate_points['BFGS'] = [bfgs_reach_min, bfgs_opt_steps, bfgs_end_point]
-        optimization_paths.append((bfgs_path, 'BFGS', 'orange'))
+        runs['BFGS'] = (bfgs_optimization, dict(iterations=iterations_bfgs))
     if 'L-BFGS-B' in Optimizer:
-        lbfgsb_path, lbfgsb_reach_min, lbfgsb_opt_steps, lbfgsb_end_point = lbfgsb_optimization(f, start_point, iterations=iterations_lbfgsb)
-        terminate_points['L-BFGS-B'] = [lbfgsb_reach_min, lbfgsb_opt_steps, lbfgsb_end_point]
-        optimization_paths.append((lbfgsb_path, 'L-BFGS-B', 'red'))
+        runs['L-BFGS-B'] = (lbfgsb_optimization, dict(iterations=iterations_lbfgsb))
 
-    if Func == 'Ackley':
-        f = f1
-        fig = plot_3d(f, points_by_dim=70, title=fr"{type(f1).__name__}", bounds=None, 
-                show_best_if_exists=False, save_as=None, cmap='viridis', 
-                plot_surface=False, plot_heatmap=True, optimization_paths=optimization_paths)
-    elif Func == 'Rastrigin':
-        f = f2
-        fig = plot_3d(f, points_by_dim=70, title=fr"{type(f2).__name__}", bounds=None, 
-                show_best_if_exists=False, save_as=None, cmap='viridis', 
-                plot_surface=False, plot_heatmap=True, optimization_paths=optimization_paths)
-    elif Func == 'Rosenbrock':
-        f = f3
-        fig = plot_3d(f, points_by_dim=70, title=fr"{type(f3).__name__}", bounds=None, 
-                show_best_if_exists=False, save_as=None, cmap='viridis', 
-                plot_surface=False, plot_heatmap=True, optimization_paths=optimization_paths)
-    elif Func == 'Fletcher':
-        f = f4
-        fig = plot_3d(f, points_by_dim=70, title=fr"{type(f4).__name__}", bounds=None, 
-                show_best_if_exists=False, save_as=None, cmap='viridis', 
-                plot_surface=False, plot_heatmap=True, optimization_paths=optimization_paths)
+    meta = {'function': Func, 'dim': dim, 'optimizers': list(Optimizer), 'show_profile': show_profile, 'profiles': {},
+            'iterations': {name: params['iterations'] for name, (_, params) in runs.items()}}
+    if dim > 2:
+        # Live view: a slice through the start point along the coordinates the optimizers leave first
+        from projection import coordinate_plane, steepest_axes
+        meta['live_plane'] = coordinate_plane(start_point, steepest_axes(functions[Func], start_point), functions[Func].bounds)
+    try:
+        st.session_state.job = job_manager.submit(st.session_state.session_id, run_job, functions[Func], Func, dim, runs,
+                                                  start_point, show_profile, meta=meta)
+    except QueueFull:
+        st.warning('The server is busy with other optimizations, please try again in a moment.')
+
+job = st.session_state.get('job')
+
+# Paths of a running high-dimensional job on its live slice. The contour grows with the
+# points that arrive: each refresh evaluates only the lattice nodes the new points add.
+def live_paths(job):
+    from chart import path_chart
+    from surface import slice_surface
+    plane = job.meta['live_plane']
+    f = get_functions(job.meta['dim'])[job.meta['function']]
+    paths = [(job.points(name), name, COLORS[name]) for name in job.meta['optimizers']]
+    paths = [(path, name, color) for path, name, color in paths if path is not None]
+    if not paths:
+        return
+    surface = slice_surface(f, plane, SLICE_POINTS)
+    surface.cover(np.vstack([path for path, _, _ in paths]))
+    chart = path_chart(f, [(plane.project(path), name, color) for path, name, color in paths],
+                       title=f"{job.meta['function']} (live slice)", grid=surface.grid(), titles=plane.titles)
+    st.altair_chart(chart, use_container_width=True)
+
+# Plane, contour and projected paths of a finished high-dimensional job. The contour is
+# bounded to SLICE_POINTS**2 evaluations and cached per plane, so switching the rendering
+# or revisiting a result does not evaluate it again.
+def project_paths(f, optimization_paths, end_points, projection):
+    from projection import coordinate_plane, pca_plane, spread_axes
+    from surface import slice_surface
+    points = np.vstack([path for path, _, _ in optimization_paths])
+    if projection == 'PCA':
+        plane = pca_plane(points)
     else:
-        f = f5
-        fig = plot_3d(f, points_by_dim=70, title=fr"{type(f5).__name__}", bounds=None, 
+        best = min(end_points, key=lambda p: np.nan_to_num(float(f(p)), nan=np.inf))
+        plane = coordinate_plane(best, spread_axes(points), f.bounds)
+    surface = slice_surface(f, plane, SLICE_POINTS)
+    surface.cover()
+    return surface.grid(), plane.titles, [(plane.project(path), name, color) for path, name, color in optimization_paths]
+
+# Progress of a running job, refreshed without rerunning the whole script
+if job is not None and not job.finished:
+
+    @st.experimental_fragment(run_every=0.5)
+    def job_progress():
+        if job.finished:
+            st.rerun()
+        st.caption('Queued behind other jobs…' if job.status == 'queued' else 'Optimizing in the background…')
+        progress = job.progress()
+        for name in job.meta['optimizers']:
+            p = progress.get(name)
+            if p is None:
+                st.progress(0.0, text=f'{name}: waiting')
+                continue
+            best = '–' if p['best_f'] == float('inf') else f"{p['best_f']:.4g}"
+            st.progress(min(p['iteration'] / max(p['iterations'], 1), 1.0),
+                        text=f"{name}: iteration {p['iteration']} / {p['iterations']} · best f {best}")
+        if st.button('Cancel', disabled=job.cancelled):
+            job.cancel()
+        if 'live_plane' in job.meta:
+            live_paths(job)
+
+    job_progress()
+
+elif job is not None and job.status == 'cancelled':
+    st.info('Optimization cancelled. Click :green[\'Optimize!\'] to start again.')
+
+elif job is not None and job.status == 'failed':
+    st.error(f'Optimization failed: {job.error}')
+
+# Show the results of the last finished job
+elif job is not None and job.status == 'done':
+    Func = job.meta['function']
+    Optimizer = job.meta['optimizers']
+    show_profile = job.meta['show_profile']
+    profiles = job.meta['profiles']
+    f = get_functions(job.meta['dim'])[Func]
+    terminate_points = {}
+    optimization_paths = []
+    for opt in Optimizer:
+        path, reach_min, opt_steps, end_point = job.result[opt]
+        terminate_points[opt] = [reach_min, opt_steps, end_point]
+        optimization_paths.append((path, opt, COLORS[opt]))
+
+    grid, titles = None, ('first dim', 'second dim')
+    if job.meta['dim'] > 2:
+        grid, titles, optimization_paths = project_paths(f, optimization_paths, [p[2] for p in terminate_points.values()],
+                                                         projection)
+
+    def point_label(point):
+        # The first two coordinates, plus the value there above 2 dims
+        if len(point) == 2:
+            return f'({point[0]:.2f}, {point[1]:.2f})'
+        return f'({point[0]:.2f}, {point[1]:.2f}, …) f = {float(f(point)):.4g}'
+
+    def profile_line(name):
+        if not show_profile:
+            return ''
+        record = profiles.get(name)
+        if record is None:
+            return '<br> ⏱️ served from the result cache'
+        return (f"<br> ⏱️ {record['evaluations']} evals · objective {record['objective_seconds'] * 1000:.1f} ms"
+                f" · overhead {record['overhead_seconds'] * 1000:.1f} ms")
+    if render_mode == 'Interactive':
+        from chart import path_chart
+        chart, plot_record = timed('plot', path_chart, f, optimization_paths, points_by_dim=GRID_POINTS,
+                                   title=Func, grid=grid, titles=titles, enabled=show_profile)
+        st.altair_chart(chart, use_container_width=True)
+    else:
+        from plot import plot_3d
+        fig, plot_record = timed('plot', plot_3d, f, points_by_dim=GRID_POINTS, title=Func, bounds=None, 
                 show_best_if_exists=False, save_as=None, cmap='viridis', 
-                plot_surface=False, plot_heatmap=True, optimization_paths=optimization_paths)
-    
-    cols = st.columns(2)
-    buf = BytesIO()
-    fig.savefig(buf, format="png")
-    st.image(buf, use_column_width=True)
-
-    optimizer_iterations = {
-        'SGD': iterations_sgd,
-        'Adam': iterations_adam,
-        'CMA-ES': iterations_cmaes,
-        'LRA-CMA': iterations_lra_cma,
-        'BFGS': iterations_bfgs,
-        'L-BFGS-B': iterations_lbfgsb
-    }
+                plot_surface=False, plot_heatmap=True, optimization_paths=optimization_paths, grid=grid, titles=titles,
+                enabled=show_profile)
+
+        buf = BytesIO()
+        fig.savefig(buf, format="png")
+        st.image(buf, use_column_width=True)
+
+    if plot_record is not None:
+        st.caption(f"⏱️ Plot built in {plot_record['seconds'] * 1000:.1f} ms")
+
+    optimizer_iterations = job.meta['iterations']
 
     # Create row1 and row2 columns
     row1 = st.columns(3)
     row2 = st.columns(3)
     all_cols = row1 + row2
+    tile_height = 165 if show_profile else 135
 
     for col, opt in zip(all_cols, Optimizer):
         max_iter = optimizer_iterations[opt]
         
         if terminate_points[opt][0]:
-            tile = col.container(height=135)
+            tile = col.container(height=tile_height)
             tile.markdown(
                 f"""
                 🎈 **{opt}** <br>
                 :green[Likely reached the global minimum] 
                 after {terminate_points[opt][1]} iterations <br>
-                Terminate point: **({terminate_points[opt][2][0]:.2f}, {terminate_points[opt][2][1]:.2f})**
+                Terminate point: **{point_label(terminate_points[opt][2])}**
+                {profile_line(opt)}
                 """,
                 unsafe_allow_html=True
             )
         elif terminate_points[opt][1] < max_iter:
-            tile = col.container(height=135)
+            tile = col.container(height=tile_height)
             tile.markdown(
                 f"""
                 🎈 **{opt}** <br>
                 :red[Did not reach global minimum and got stuck] 
                 after {terminate_points[opt][1]} iterations <br>
-                Terminate point: **({terminate_points[opt][2][0]:.2f}, {terminate_points[opt][2][1]:.2f})**
+                Terminate point: **{point_label(terminate_points[opt][2])}**
+                {profile_line(opt)}
                 """,
                 unsafe_allow_html=True
             )
         else:
-            tile = col.container(height=135)
+            tile = col.container(height=tile_height)
             tile.markdown(
                 f"""
                 🎈 **{opt}** <br>
                 :red[Did not reach global minimum] 
                 after {terminate_points[opt][1]} iterations <br>
-                Terminate point: **({terminate_points[opt][2][0]:.2f}, {terminate_points[opt][2][1]:.2f})**
+                Terminate point: **{point_label(terminate_points[opt][2])}**
+                {profile_line(opt)}
                 """,
                 unsafe_allow_html=True
             )